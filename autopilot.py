@@ -0,0 +1,250 @@
+import heapq
+from array import array
+
+DENSE_FRACTION = 0.5
+RECHECK_TICKS = 8
+SHORTCUT_MARGIN = 4
+MAX_CYCLE_CELLS = 1 << 20
+ESCAPE_BUDGET = 192
+PATH_BUDGET = 1024
+MAX_ADJACENCY_CELLS = 1 << 16
+
+_cycles = {}
+_adjacency = {}
+
+def hamiltonian_cycle(width, height):
+    if height % 2:
+        return [(x, y) for y, x in hamiltonian_cycle(height, width)]
+    cycle = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        row = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        cycle.extend((x, y) for x in row)
+    cycle.extend((0, y) for y in range(height - 1, 0, -1))
+    return cycle
+
+def cycle_cells(width, height):
+    key = (width, height)
+    if key not in _cycles:
+        cycle = None
+        if width > 1 and height > 1 and (width % 2 == 0 or height % 2 == 0) and width * height <= MAX_CYCLE_CELLS:
+            sequence = array('l', (y * width + x for x, y in hamiltonian_cycle(width, height)))
+            order = array('l', [0]) * len(sequence)
+            for index, cell in enumerate(sequence):
+                order[cell] = index
+            cycle = (order, sequence)
+        _cycles[key] = cycle
+    return _cycles[key]
+
+class Neighbors:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+    
+    def __getitem__(self, cell):
+        width = self.width
+        y, x = divmod(cell, width)
+        return tuple(neighbor for neighbor, inside in ((cell - 1, x > 0), (cell + 1, x < width - 1),
+                                                       (cell - width, y > 0), (cell + width, y < self.height - 1)) if inside)
+
+def adjacency(width, height):
+    key = (width, height)
+    if key not in _adjacency:
+        neighbors = Neighbors(width, height)
+        if width * height > MAX_ADJACENCY_CELLS:
+            return neighbors
+        _adjacency[key] = [neighbors[cell] for cell in range(width * height)]
+    return _adjacency[key]
+
+class Autopilot:
+    def __init__(self, game, dense_fraction=DENSE_FRACTION, recheck_ticks=RECHECK_TICKS, margin=SHORTCUT_MARGIN,
+                 escape_budget=ESCAPE_BUDGET, path_budget=PATH_BUDGET):
+        body = game.snake.positions
+        self.width = body.width
+        self.height = body.height
+        self.cells = self.width * self.height
+        self.dense_length = int(self.cells * dense_fraction)
+        self.recheck_ticks = recheck_ticks
+        self.margin = margin
+        self.escape_budget = escape_budget
+        self.path_budget = path_budget
+        self.adjacent = adjacency(self.width, self.height)
+        self.order, self.sequence = cycle_cells(self.width, self.height) or (None, None)
+        self.aligned = self.is_aligned(body)
+        self.path = []
+        self.target = None
+        self.retry_tick = 0
+        self.expected = None
+    
+    def cell(self, position):
+        return position[1] * self.width + position[0]
+    
+    def direction(self, head, cell):
+        delta = cell - head
+        if delta == 1:
+            return (1, 0)
+        if delta == -1:
+            return (-1, 0)
+        if delta > 0:
+            return (0, 1)
+        return (0, -1)
+    
+    def is_aligned(self, body):
+        if self.order is None:
+            return False
+        order = self.order
+        tail = order[self.cell(body.tail)]
+        span = (order[self.cell(body.head)] - tail) % self.cells
+        return all((order[self.cell(position)] - tail) % self.cells <= span for position in body)
+    
+    def find_path(self, occupancy, start, goal, back):
+        width = self.width
+        goal_x, goal_y = goal % width, goal // width
+        came_from = {start: None, back: None}
+        cost = {start: 0}
+        frontier = [(0, 0, start)]
+        budget = self.path_budget
+        while frontier and budget:
+            budget -= 1
+            _, _, cell = heapq.heappop(frontier)
+            if cell == goal:
+                path = []
+                while cell != start:
+                    path.append(cell)
+                    cell = came_from[cell]
+                return path
+            steps = cost[cell] + 1
+            for neighbor in self.adjacent[cell]:
+                if neighbor in came_from or occupancy[neighbor]:
+                    continue
+                came_from[neighbor] = cell
+                cost[neighbor] = steps
+                estimate = abs(neighbor % width - goal_x) + abs(neighbor // width - goal_y)
+                heapq.heappush(frontier, (steps + estimate, estimate, neighbor))
+        return None
+    
+    def plan(self, game, head, food, back):
+        self.target = food
+        self.path = self.find_path(game.snake.positions.occupancy, head, food, back) or []
+        if not self.path:
+            self.retry_tick = game.tick + self.recheck_ticks
+    
+    def steer_cycle(self, game, head, back):
+        snake = game.snake
+        body = snake.positions
+        occupancy = body.occupancy
+        order = self.order
+        cells = self.cells
+        position = order[head]
+        gap = (order[self.cell(body.tail)] - position) % cells or cells
+        following = self.sequence[(position + 1) % cells]
+        if len(body) >= self.dense_length or game.food.position is None:
+            return following
+        
+        food = self.cell(game.food.position)
+        reserve = self.margin + (2 if snake.grow else 0)
+        if food != self.target:
+            self.plan(game, head, food, back)
+        food_distance = (order[food] - position) % cells
+        if self.path:
+            step = self.path[-1]
+            distance = (order[step] - position) % cells
+            if distance <= food_distance and distance < gap - reserve - (2 if step == food else 0):
+                return self.path.pop()
+            self.path = []
+        
+        best = following if following != back else None
+        best_distance = 1
+        for neighbor in self.adjacent[head]:
+            distance = (order[neighbor] - position) % cells
+            if (occupancy[neighbor] or neighbor == back or distance >= gap - reserve - (2 if neighbor == food else 0)
+                    or (best is not None and not best_distance < distance <= food_distance)):
+                continue
+            best, best_distance = neighbor, distance
+        return best
+    
+    def escapes(self, segments, length, delay=0):
+        vacate = {cell: length - index + delay for index, cell in enumerate(segments)}
+        room = min(length, self.escape_budget)
+        seen = {segments[0]}
+        frontier = [segments[0]]
+        steps = 0
+        while frontier:
+            steps += 1
+            reached = []
+            for cell in frontier:
+                for neighbor in self.adjacent[cell]:
+                    if neighbor in seen:
+                        continue
+                    if neighbor in vacate:
+                        if vacate[neighbor] < steps:
+                            return True
+                        continue
+                    seen.add(neighbor)
+                    if len(seen) > room:
+                        return True
+                    reached.append(neighbor)
+            frontier = reached
+        return False
+    
+    def path_is_safe(self, body, path):
+        length = len(body) + 1
+        segments = path[:length]
+        if len(segments) < length:
+            segments.extend(self.cell(position) for position in body)
+            del segments[length:]
+        return self.escapes(segments, length, 1)
+    
+    def survive(self, snake, head, back):
+        body = snake.positions
+        occupancy = body.occupancy
+        segments = [self.cell(position) for position in body]
+        segments.pop()
+        best = None
+        best_score = None
+        for neighbor in self.adjacent[head]:
+            if occupancy[neighbor] or neighbor == back:
+                continue
+            escapes = self.escapes([neighbor] + segments, len(body), 1 if snake.grow else 0)
+            exits = sum(1 for cell in self.adjacent[neighbor] if not occupancy[cell])
+            score = (escapes, -exits)
+            if best_score is None or score > best_score:
+                best, best_score = neighbor, score
+        return best
+    
+    def steer_free(self, game, head, back):
+        snake = game.snake
+        body = snake.positions
+        if game.food.position is None:
+            return self.survive(snake, head, back)
+        
+        food = self.cell(game.food.position)
+        if food != self.target or (not self.path and game.tick >= self.retry_tick):
+            self.plan(game, head, food, back)
+            if self.path and not self.path_is_safe(body, self.path):
+                self.path = []
+                self.retry_tick = game.tick + self.recheck_ticks
+        if self.path and not body.occupancy[self.path[-1]]:
+            return self.path.pop()
+        self.path = []
+        return self.survive(snake, head, back)
+    
+    def __call__(self, game):
+        snake = game.snake
+        body = snake.positions
+        head = self.cell(body.head)
+        if self.expected is not None and head != self.expected:
+            self.path = []
+            self.aligned = self.is_aligned(body)
+        elif not self.aligned and self.order is not None and game.tick % self.recheck_ticks == 0:
+            self.aligned = self.is_aligned(body)
+        
+        back = (body.head[0] - snake.direction[0], body.head[1] - snake.direction[1])
+        back = self.cell(back) if 0 <= back[0] < self.width and 0 <= back[1] < self.height else -1
+        if self.aligned:
+            cell = self.steer_cycle(game, head, back)
+        else:
+            cell = self.steer_free(game, head, back)
+        self.expected = cell
+        if cell is None:
+            return None
+        return self.direction(head, cell)
\ No newline at end of file
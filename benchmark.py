@@ -0,0 +1,286 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import gc
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from autopilot import hamiltonian_cycle
+from entities import FOOD, EntityStore
+from free_cells import FreeCellIndex
+from observation import PixelRenderer
+from particles import ParticleSystem
+from snake_body import SnakeBody
+
+GAMES = ('snake_game', 'snake_enhanced')
+GRIDS = ((20, 16), (40, 30), (80, 60))
+LENGTHS = (4, 64, 512)
+PARTICLE_COUNTS = (100, 1000, 4000)
+QUICK_GRIDS = ((40, 30),)
+QUICK_LENGTHS = (4, 64)
+QUICK_PARTICLE_COUNTS = (1000,)
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_TOLERANCE = 0.25
+SEED = 1234
+
+@contextmanager
+def board(module, width, height):
+    names = ('GRID_WIDTH', 'GRID_HEIGHT', 'WINDOW_WIDTH', 'WINDOW_HEIGHT')
+    saved = [getattr(module, name) for name in names]
+    values = (width, height, width * module.GRID_SIZE, height * module.GRID_SIZE)
+    for name, value in zip(names, values):
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in zip(names, saved):
+            setattr(module, name, value)
+
+class Course:
+    def __init__(self, width, height):
+        self.cycle = hamiltonian_cycle(width, height)
+        self.successor = {cell: self.cycle[(i + 1) % len(self.cycle)] for i, cell in enumerate(self.cycle)}
+    
+    def body(self, length):
+        return [self.cycle[i] for i in range(length - 1, -1, -1)]
+    
+    def steer(self, snake):
+        head = snake.positions[0]
+        target = self.successor[head]
+        snake.direction = (target[0] - head[0], target[1] - head[1])
+        return target
+
+def build_game(module, width, height, length):
+    course = Course(width, height)
+    game = module.Game(seed=SEED)
+    game.free_cells = FreeCellIndex(width, height)
+    snake = module.Snake()
+    snake.positions = SnakeBody(width, height, course.body(length), game.free_cells)
+    game.snake = snake
+    game.food = module.Food(game.free_cells, game.rng)
+    if hasattr(game, 'entities'):
+        game.entities = EntityStore(width, height, game.free_cells)
+        game.entities.add(game.food, FOOD)
+        game.reschedule()
+    course.steer(snake)
+    return game, course
+
+def measure(operation, setup=None, ops=200, rounds=7):
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            state = setup() if setup is not None else None
+            start = time.perf_counter()
+            for _ in range(ops):
+                operation(state)
+            samples.append((time.perf_counter() - start) / ops)
+    finally:
+        gc.enable()
+    samples.sort()
+    return {
+        'ops': ops,
+        'rounds': rounds,
+        'median_us': statistics.median(samples) * 1e6,
+        'min_us': samples[0] * 1e6,
+        'max_us': samples[-1] * 1e6,
+    }
+
+def calibrate():
+    def spin(_):
+        table = {}
+        for i in range(1000):
+            table[i & 63] = table.get(i & 63, 0) + i
+    
+    return measure(spin, ops=100, rounds=9)['median_us']
+
+def bench_move(module, width, height, length):
+    ops = min(200, width * height - length)
+    
+    def setup():
+        return build_game(module, width, height, length)
+    
+    def move(state):
+        game, course = state
+        if not game.snake.move():
+            raise RuntimeError("snake died during the move benchmark")
+        course.steer(game.snake)
+    
+    return measure(move, setup, ops)
+
+def bench_food_respawn(module, width, height, length):
+    ops = min(100, (width * height - length) // 2)
+    
+    def setup():
+        return build_game(module, width, height, length)
+    
+    def eat(state):
+        game, course = state
+        target = course.successor[game.snake.positions[0]]
+        entities = getattr(game, 'entities', None)
+        if entities is not None:
+            entities.remove(game.food)
+        game.free_cells.release(game.food.position)
+        game.free_cells.occupy(target)
+        game.food.position = target
+        if entities is not None:
+            entities.add(game.food, FOOD)
+        if not game.update():
+            raise RuntimeError("snake died during the food respawn benchmark")
+        course.steer(game.snake)
+    
+    return measure(eat, setup, ops)
+
+def bench_spawn_power_up(module, width, height, length):
+    def setup():
+        return build_game(module, width, height, length)[0]
+    
+    def spawn(game):
+        game.next_power_up_tick = game.tick
+        game.spawn_power_up()
+        for kind in module.POWER_UP_TYPES:
+            game.entities.despawn(kind)
+        game.scheduler.clear()
+    
+    return measure(spawn, setup)
+
+def bench_draw(module, width, height, length):
+    def setup():
+        return build_game(module, width, height, length)[0]
+    
+    def draw(game):
+        game.draw(0.5)
+    
+    return measure(draw, setup, 50, 5)
+
+def bench_pixels(module, width, height, length):
+    renderer = PixelRenderer(module, width, height)
+    frame = np.empty(renderer.shape, dtype=np.uint8)
+    
+    def setup():
+        return build_game(module, width, height, length)[0]
+    
+    def render(game):
+        renderer.render(game, frame)
+    
+    return measure(render, setup, 50, 5)
+
+def bench_particles(count):
+    screen = pygame.Surface((800, 600))
+    
+    def setup():
+        particles = ParticleSystem(max(4096, count), seed=SEED)
+        rng = np.random.default_rng(SEED)
+        while len(particles) < count:
+            particles.emit(rng.uniform(100, 700), rng.uniform(100, 500), (255, 0, 0), min(25, count - len(particles)))
+        return particles
+    
+    def update(particles):
+        particles.update()
+        particles.life[:particles.count] = 15
+    
+    def draw(particles):
+        particles.draw(screen, 0.5)
+    
+    return measure(update, setup), measure(draw, setup, 50, 5)
+
+def run(quick=False, games=GAMES):
+    grids = QUICK_GRIDS if quick else GRIDS
+    lengths = QUICK_LENGTHS if quick else LENGTHS
+    results = {}
+    for name in games:
+        module = importlib.import_module(name)
+        for width, height in grids:
+            with board(module, width, height):
+                for length in lengths:
+                    if length * 2 > width * height:
+                        continue
+                    key = f"grid={width}x{height}/length={length}"
+                    results[f"{name}/move/{key}"] = bench_move(module, width, height, length)
+                    results[f"{name}/food_respawn/{key}"] = bench_food_respawn(module, width, height, length)
+                    if hasattr(module.Game, 'spawn_power_up'):
+                        results[f"{name}/spawn_power_up/{key}"] = bench_spawn_power_up(module, width, height, length)
+                    results[f"{name}/draw/{key}"] = bench_draw(module, width, height, length)
+                    results[f"{name}/pixels/{key}"] = bench_pixels(module, width, height, length)
+    for count in QUICK_PARTICLE_COUNTS if quick else PARTICLE_COUNTS:
+        update, draw = bench_particles(count)
+        results[f"particles/update/count={count}"] = update
+        results[f"particles/draw/count={count}"] = draw
+    return results
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+    }
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    scale = report['calibration_us'] / baseline.get('calibration_us', report['calibration_us'])
+    print(f"machine speed relative to baseline: {1 / scale:.2f}x")
+    regressions = []
+    for key, result in sorted(report['results'].items()):
+        reference = baseline['results'].get(key)
+        if reference is None:
+            continue
+        ratio = result['median_us'] / (reference['median_us'] * scale)
+        status = 'REGRESSION' if ratio > 1 + tolerance else 'ok'
+        print(f"{status:>10} {ratio:6.2f}x {result['median_us']:10.1f}us  {key}")
+        if status != 'ok':
+            regressions.append(key)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the snake move, spawn and draw hot paths")
+    parser.add_argument('--quick', action='store_true', help="run a reduced matrix")
+    parser.add_argument('--game', choices=GAMES, action='append', help="benchmark only this game (repeatable)")
+    parser.add_argument('--output', metavar='JSON', help="write results to this file")
+    parser.add_argument('--baseline', metavar='JSON', default=DEFAULT_BASELINE, help="compare against this baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="overwrite the baseline with these results")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown ratio above 1.0")
+    args = parser.parse_args(argv)
+    
+    pygame.init()
+    calibration = calibrate()
+    results = run(args.quick, args.game or GAMES)
+    calibration = min(calibration, calibrate())
+    report = {'environment': environment(), 'calibration_us': calibration, 'results': results}
+    
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+        print(f"saved {len(results)} results to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        for key, result in sorted(results.items()):
+            print(f"{result['median_us']:10.1f}us  {key}")
+        return 0
+    
+    with open(args.baseline) as baseline:
+        regressions = compare(report, json.load(baseline), args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,78 @@
+import pygame
+
+from chunks import CHUNK_SIZE
+from render_cache import LRUCache
+
+MAX_CHUNK_SURFACES = 64
+
+class Camera:
+    def __init__(self, viewport, board_pixels):
+        self.width, self.height = viewport
+        self.board_width, self.board_height = board_pixels
+        self.x = 0
+        self.y = 0
+    
+    def follow(self, target):
+        self.x = min(max(0, target[0] - self.width // 2), max(0, self.board_width - self.width))
+        self.y = min(max(0, target[1] - self.height // 2), max(0, self.board_height - self.height))
+    
+    def rect(self):
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+    
+    def to_screen(self, pixel):
+        return (pixel[0] - self.x, pixel[1] - self.y)
+    
+    def visible_chunks(self, chunk_pixels):
+        right = min(self.x + self.width, self.board_width) - 1
+        bottom = min(self.y + self.height, self.board_height) - 1
+        for chunk_y in range(self.y // chunk_pixels, bottom // chunk_pixels + 1):
+            for chunk_x in range(self.x // chunk_pixels, right // chunk_pixels + 1):
+                yield (chunk_x, chunk_y)
+
+class ChunkRenderer:
+    def __init__(self, body, cell_size, background, chunk_size=CHUNK_SIZE, max_chunks=MAX_CHUNK_SURFACES):
+        self.body = body
+        self.cell_size = cell_size
+        self.background = background
+        self.chunk_size = chunk_size
+        self.chunk_pixels = chunk_size * cell_size
+        self.surfaces = LRUCache(max_chunks)
+        self.drawn_head = None
+        body.track_changes()
+    
+    def render_chunk(self, key, sprite):
+        surface = pygame.Surface((self.chunk_pixels, self.chunk_pixels))
+        surface.fill(self.background)
+        head = self.body.head
+        for position in self.body.occupancy.occupied(key):
+            if position != head:
+                surface.blit(sprite, self.cell_offset(position))
+        return surface
+    
+    def cell_offset(self, position):
+        return ((position[0] % self.chunk_size) * self.cell_size, (position[1] % self.chunk_size) * self.cell_size)
+    
+    def refresh(self, sprite):
+        changed = self.body.drain_changes()
+        head = self.body.head
+        if head != self.drawn_head:
+            if self.drawn_head is not None:
+                changed.add(self.drawn_head)
+            changed.add(head)
+            self.drawn_head = head
+        
+        entries = self.surfaces.entries
+        for position in changed:
+            surface = entries.get((position[0] // self.chunk_size, position[1] // self.chunk_size))
+            if surface is None:
+                continue
+            offset = self.cell_offset(position)
+            surface.fill(self.background, (offset, (self.cell_size, self.cell_size)))
+            if position != head and position in self.body:
+                surface.blit(sprite, offset)
+    
+    def draw(self, screen, camera, sprite):
+        self.refresh(sprite)
+        for key in camera.visible_chunks(self.chunk_pixels):
+            surface = self.surfaces.get_or_create(key, self.render_chunk, key, sprite)
+            screen.blit(surface, camera.to_screen((key[0] * self.chunk_pixels, key[1] * self.chunk_pixels)))
\ No newline at end of file
@@ -0,0 +1,53 @@
+from array import array
+
+CHUNK_SIZE = 32
+
+class ChunkedOccupancy:
+    def __init__(self, width, height, chunk_size=CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.totals = {}
+    
+    def __len__(self):
+        return self.width * self.height
+    
+    def locate(self, cell):
+        y, x = divmod(cell, self.width)
+        size = self.chunk_size
+        return (x // size, y // size), (y % size) * size + x % size
+    
+    def __getitem__(self, cell):
+        key, offset = self.locate(cell)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return 0
+        return chunk[offset]
+    
+    def __setitem__(self, cell, value):
+        key, offset = self.locate(cell)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if value == 0:
+                return
+            chunk = self.chunks[key] = array('H', bytes(2 * self.chunk_size * self.chunk_size))
+            self.totals[key] = 0
+        total = self.totals[key] + value - chunk[offset]
+        chunk[offset] = value
+        if total == 0:
+            del self.chunks[key]
+            del self.totals[key]
+        else:
+            self.totals[key] = total
+    
+    def occupied(self, key):
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return
+        size = self.chunk_size
+        left = key[0] * size
+        top = key[1] * size
+        for offset, count in enumerate(chunk):
+            if count:
+                yield (left + offset % size, top + offset // size)
\ No newline at end of file
@@ -0,0 +1,57 @@
+import pygame
+
+class DirtyRectTracker:
+    def __init__(self, size, cell_size, max_rects=64, max_coverage=0.4):
+        self.bounds = pygame.Rect((0, 0), size)
+        self.cell_size = cell_size
+        self.grid_width = size[0] // cell_size
+        self.grid_height = size[1] // cell_size
+        self.max_rects = max_rects
+        self.max_area = int(size[0] * size[1] * max_coverage)
+        self.rects = []
+        self.area = 0
+        self.full = True
+    
+    def __len__(self):
+        return len(self.rects)
+    
+    def invalidate(self):
+        self.full = True
+    
+    def clear(self):
+        self.rects = []
+        self.area = 0
+        self.full = False
+    
+    def add(self, rect):
+        if self.full:
+            return
+        rect = self.bounds.clip(rect)
+        if rect.width == 0 or rect.height == 0:
+            return
+        self.rects.append(rect)
+        self.area += rect.width * rect.height
+        if len(self.rects) > self.max_rects or self.area > self.max_area:
+            self.full = True
+    
+    def add_cell(self, position, inflate=0):
+        self.add(self.cell_rect(position).inflate(inflate * 2, inflate * 2))
+    
+    def cell_rect(self, position):
+        return pygame.Rect(position[0] * self.cell_size, position[1] * self.cell_size, self.cell_size, self.cell_size)
+    
+    def cells_in(self, rect):
+        left = max(0, rect.left // self.cell_size)
+        top = max(0, rect.top // self.cell_size)
+        right = min(self.grid_width - 1, (rect.right - 1) // self.cell_size)
+        bottom = min(self.grid_height - 1, (rect.bottom - 1) // self.cell_size)
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                yield (x, y)
+    
+    def present(self):
+        if self.full:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.clear()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import random
+
+FOOD = 'food'
+WALL = 'wall'
+
+class EntityStore:
+    def __init__(self, width, height, free_cells=None):
+        self.width = width
+        self.height = height
+        self.free_cells = free_cells
+        self.cells = {}
+        self.kinds = {}
+        self.next_id = 1
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def __iter__(self):
+        return iter(self.cells.values())
+    
+    def __contains__(self, position):
+        return self.cell(position) in self.cells
+    
+    def cell(self, position):
+        return position[1] * self.width + position[0]
+    
+    def get(self, cell):
+        return self.cells.get(cell)
+    
+    def at(self, position):
+        return self.cells.get(position[1] * self.width + position[0])
+    
+    def of_kind(self, kind):
+        return self.kinds.get(kind, {}).values()
+    
+    def count(self, kind):
+        return len(self.kinds.get(kind, ()))
+    
+    def add(self, entity, kind):
+        if entity.position is None:
+            return None
+        cell = self.cell(entity.position)
+        if cell in self.cells:
+            raise ValueError(f"{entity.position} already holds a {self.cells[cell].kind}")
+        entity.id = self.next_id
+        entity.kind = kind
+        self.next_id += 1
+        self.cells[cell] = entity
+        bucket = self.kinds.get(kind)
+        if bucket is None:
+            bucket = self.kinds[kind] = {}
+        bucket[cell] = entity
+        return entity
+    
+    def remove(self, entity, release=False):
+        cell = self.cell(entity.position)
+        del self.cells[cell]
+        del self.kinds[entity.kind][cell]
+        if release and self.free_cells is not None:
+            self.free_cells.release(entity.position)
+        return entity
+    
+    def pop(self, position):
+        entity = self.at(position)
+        if entity is not None:
+            self.remove(entity)
+        return entity
+    
+    def spawn(self, factory, kind, count, rng=random):
+        spawned = []
+        for _ in range(count):
+            position = self.free_cells.take(rng)
+            if position is None:
+                break
+            spawned.append(self.add(factory(position), kind))
+        return spawned
+    
+    def despawn(self, kind=None, release=True):
+        entities = list(self.cells.values() if kind is None else self.of_kind(kind))
+        for entity in entities:
+            self.remove(entity, release)
+        return entities
+    
+    def clear(self):
+        self.cells.clear()
+        self.kinds.clear()
\ No newline at end of file
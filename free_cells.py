@@ -0,0 +1,105 @@
+import random
+from array import array
+
+class FreeCellIndex:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = array('l', range(width * height))
+        self.slots = array('l', range(width * height))
+        self.free_count = width * height
+    
+    def __len__(self):
+        return self.free_count
+    
+    @property
+    def full(self):
+        return self.free_count == 0
+    
+    def is_free(self, position):
+        return self.slots[position[1] * self.width + position[0]] < self.free_count
+    
+    def _swap(self, slot_a, slot_b):
+        cell_a = self.cells[slot_a]
+        cell_b = self.cells[slot_b]
+        self.cells[slot_a] = cell_b
+        self.cells[slot_b] = cell_a
+        self.slots[cell_a] = slot_b
+        self.slots[cell_b] = slot_a
+    
+    def occupy(self, position):
+        slot = self.slots[position[1] * self.width + position[0]]
+        if slot >= self.free_count:
+            return False
+        self.free_count -= 1
+        self._swap(slot, self.free_count)
+        return True
+    
+    def release(self, position):
+        slot = self.slots[position[1] * self.width + position[0]]
+        if slot < self.free_count:
+            return False
+        self._swap(slot, self.free_count)
+        self.free_count += 1
+        return True
+    
+    def sample(self, rng=random):
+        if self.free_count == 0:
+            return None
+        cell = self.cells[rng.randrange(self.free_count)]
+        return (cell % self.width, cell // self.width)
+    
+    def take(self, rng=random):
+        position = self.sample(rng)
+        if position is not None:
+            self.occupy(position)
+        return position
+
+class SparseFreeCells:
+    def __init__(self, width, height, max_tries=64):
+        self.width = width
+        self.height = height
+        self.max_tries = max_tries
+        self.occupied = set()
+    
+    def __len__(self):
+        return self.width * self.height - len(self.occupied)
+    
+    @property
+    def full(self):
+        return len(self.occupied) == self.width * self.height
+    
+    def is_free(self, position):
+        return position not in self.occupied
+    
+    def occupy(self, position):
+        if position in self.occupied:
+            return False
+        self.occupied.add(position)
+        return True
+    
+    def release(self, position):
+        if position not in self.occupied:
+            return False
+        self.occupied.remove(position)
+        return True
+    
+    def sample(self, rng=random):
+        if self.full:
+            return None
+        for _ in range(self.max_tries):
+            position = (rng.randrange(self.width), rng.randrange(self.height))
+            if position not in self.occupied:
+                return position
+        total = self.width * self.height
+        start = rng.randrange(total)
+        for offset in range(total):
+            y, x = divmod((start + offset) % total, self.width)
+            if (x, y) not in self.occupied:
+                return (x, y)
+    
+    def take(self, rng=random):
+        position = self.sample(rng)
+        if position is not None:
+            self.occupy(position)
+        return position
\ No newline at end of file
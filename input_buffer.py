@@ -0,0 +1,46 @@
+from collections import deque
+
+MAX_QUEUED = 3
+LATENCY_SAMPLES = 256
+
+class InputBuffer:
+    def __init__(self, max_queued=MAX_QUEUED):
+        self.max_queued = max_queued
+        self.queue = deque()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.dropped = 0
+    
+    def __len__(self):
+        return len(self.queue)
+    
+    def clear(self):
+        self.queue.clear()
+    
+    def push(self, direction, timestamp, current_direction):
+        last = self.queue[-1][0] if self.queue else current_direction
+        if direction == last or direction == (-last[0], -last[1]):
+            return False
+        if len(self.queue) >= self.max_queued:
+            self.dropped += 1
+            return False
+        self.queue.append((direction, timestamp))
+        return True
+    
+    def pop(self, now):
+        if not self.queue:
+            return None
+        direction, timestamp = self.queue.popleft()
+        self.latencies.append(now - timestamp)
+        return direction
+    
+    def latency_stats(self):
+        if not self.latencies:
+            return None
+        samples = sorted(self.latencies)
+        return {
+            'count': len(samples),
+            'p50': samples[len(samples) // 2],
+            'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            'max': samples[-1],
+            'dropped': self.dropped,
+        }
\ No newline at end of file
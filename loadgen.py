@@ -0,0 +1,144 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import asyncio
+import base64
+import random
+import statistics
+import struct
+import sys
+import time
+
+from replay import read_varint
+from server import DEFAULT_HOST, DEFAULT_PORT, JOIN, TICK, TIMESTAMP, TURN, TcpConnection, WebSocketConnection, WorldView
+
+DEFAULT_CLIENTS = 200
+DEFAULT_ROOMS = 4
+DEFAULT_DURATION = 20.0
+TURN_CHANCE = 0.1
+
+def masked_frame(payload):
+    mask = os.urandom(4)
+    data = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return struct.pack('!BB', 0x82, 0x80 | len(payload)) + mask + data
+
+class LoadClient:
+    def __init__(self, index, room, websocket, turn_chance, track):
+        self.index = index
+        self.room = room
+        self.websocket = websocket
+        self.rng = random.Random(index)
+        self.turn_chance = turn_chance
+        self.view = WorldView() if track else None
+        self.latencies = []
+        self.ticks = 0
+        self.missed = 0
+        self.bytes = 0
+        self.turns = 0
+        self.last_tick = None
+        self.error = None
+    
+    async def connect(self, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        if self.websocket:
+            key = base64.b64encode(os.urandom(16))
+            writer.write(b'GET / HTTP/1.1\r\nHost: ' + host.encode() + b'\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Key: ' + key + b'\r\nSec-WebSocket-Version: 13\r\n\r\n')
+            response = await reader.readuntil(b'\r\n\r\n')
+            if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+                raise ConnectionError(f"websocket upgrade refused: {response[:64]!r}")
+            self.connection = WebSocketConnection(reader, writer, limit=None)
+        else:
+            self.connection = TcpConnection(reader, writer, limit=None)
+        self.writer = writer
+    
+    def send(self, payload):
+        self.writer.write(masked_frame(payload) if self.websocket else TcpConnection.frame(payload))
+    
+    async def run(self, host, port, until):
+        try:
+            await self.connect(host, port)
+            self.send(bytes((JOIN,)) + self.room.encode())
+            while time.time() < until:
+                payload = await asyncio.wait_for(self.connection.receive(), until - time.time())
+                if payload is None:
+                    break
+                self.bytes += len(payload)
+                if self.view is not None:
+                    self.view.apply(payload)
+                if payload[0] != TICK:
+                    continue
+                timestamp = self.record(payload)
+                self.latencies.append(time.time() - timestamp)
+                if self.rng.random() < self.turn_chance:
+                    self.send(bytes((TURN, self.rng.randrange(4))))
+                    self.turns += 1
+        except asyncio.TimeoutError:
+            pass
+        except (OSError, asyncio.IncompleteReadError) as error:
+            self.error = error
+        finally:
+            if hasattr(self, 'writer'):
+                self.writer.close()
+    
+    def record(self, payload):
+        tick, offset = read_varint(payload, 1)
+        if self.last_tick is not None and tick != self.last_tick + 1:
+            self.missed += tick - self.last_tick - 1
+        self.last_tick = tick
+        self.ticks += 1
+        return TIMESTAMP.unpack_from(payload, offset)[0]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+async def run(host, port, clients, rooms, duration, websocket_share, turn_chance, track, ramp):
+    until = time.time() + duration
+    load = [LoadClient(index, f"load-{index % rooms}", index < clients * websocket_share, turn_chance, track)
+            for index in range(clients)]
+    tasks = []
+    for client in load:
+        tasks.append(asyncio.create_task(client.run(host, port, until)))
+        if ramp:
+            await asyncio.sleep(ramp / clients)
+    await asyncio.gather(*tasks)
+    return load
+
+def report(load, duration):
+    latencies = [latency * 1000 for client in load for latency in client.latencies]
+    failed = [client for client in load if client.error is not None]
+    ticks = sum(client.ticks for client in load)
+    print(f"clients={len(load)} failed={len(failed)} websocket={sum(client.websocket for client in load)}")
+    print(f"ticks received={ticks} missed={sum(client.missed for client in load)} "
+          f"per client={ticks / len(load) / duration:.1f}/s turns sent={sum(client.turns for client in load)}")
+    print(f"received {sum(client.bytes for client in load) / duration / 1024:.1f} KiB/s, "
+          f"{statistics.fmean(client.bytes / max(1, client.ticks) for client in load):.0f} bytes per client tick")
+    if latencies:
+        print(f"tick latency ms: p50={percentile(latencies, 0.5):.2f} p95={percentile(latencies, 0.95):.2f} "
+              f"p99={percentile(latencies, 0.99):.2f} max={max(latencies):.2f}")
+    for client in failed[:5]:
+        print(f"client {client.index}: {client.error!r}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect many bot clients to server.py and measure per-tick latency")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument('--rooms', type=int, default=DEFAULT_ROOMS)
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="seconds to stay connected")
+    parser.add_argument('--websocket-share', type=float, default=0.0, help="fraction of clients that connect over WebSocket")
+    parser.add_argument('--turn-chance', type=float, default=TURN_CHANCE, help="chance of sending a turn after each tick")
+    parser.add_argument('--track', action='store_true', help="decode every delta into a local world view")
+    parser.add_argument('--ramp', type=float, default=1.0, metavar='SECONDS', help="spread connections over this long")
+    args = parser.parse_args(argv)
+    
+    load = asyncio.run(run(args.host, args.port, args.clients, args.rooms, args.duration,
+                           args.websocket_share, args.turn_chance, args.track, args.ramp))
+    report(load, args.duration)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,137 @@
+import sys
+
+import numpy as np
+import pygame
+
+from entities import FOOD as FOOD_ENTITY, WALL
+from particles import ALPHA_STEPS, PARTICLE_LIFE
+from render_cache import RenderCache
+
+EMPTY, BODY, HEAD, FOOD, GHOST_BODY, GHOST_HEAD = range(6)
+POWER_UP_LABEL = 6
+
+def cell_surface(size, sprite=None, offset=(0, 0), color=None):
+    surface = pygame.Surface((size, size))
+    if color is not None:
+        surface.fill(color)
+    if sprite is not None:
+        surface.blit(sprite, offset)
+    return surface
+
+def classic_sprites(module):
+    size = module.GRID_SIZE
+    segment = cell_surface(size, module.render_segment())
+    return [cell_surface(size), segment, segment, cell_surface(size, color=module.RED)]
+
+def enhanced_sprites(module):
+    size = module.GRID_SIZE
+    cache = RenderCache()
+    food = module.Food.__new__(module.Food)
+    sprites = [
+        cell_surface(size),
+        cell_surface(size, module.render_segment(False, False)),
+        cell_surface(size, module.render_segment(True, False), (-2, -2)),
+        cell_surface(size, food.render_sprite(0), (-module.FOOD_PULSE, -module.FOOD_PULSE)),
+        cell_surface(size, module.render_segment(False, True)),
+        cell_surface(size, module.render_segment(True, True), (-2, -2)),
+    ]
+    for kind in module.POWER_UP_TYPES:
+        power_up = module.PowerUp.__new__(module.PowerUp)
+        power_up.type = kind
+        sprites.append(cell_surface(size, power_up.render_sprite(module.GLOW_STEPS - 1, cache)))
+    sprites.append(cell_surface(size, module.Wall((0, 0)).render_sprite()))
+    return sprites
+
+class PixelRenderer:
+    def __init__(self, module, width, height, cell_size=None, particles=False):
+        self.module = module
+        self.enhanced = hasattr(module, 'PowerUp')
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size or module.GRID_SIZE
+        self.scale = self.cell_size / module.GRID_SIZE
+        self.particles = particles and self.enhanced
+        self.shape = (height * self.cell_size, width * self.cell_size, 3)
+        
+        sprites = enhanced_sprites(module) if self.enhanced else classic_sprites(module)
+        self.tiles = np.concatenate([self.tile(sprite) for sprite in sprites])
+        power_up_types = getattr(module, 'POWER_UP_TYPES', ())
+        self.entity_labels = {kind: POWER_UP_LABEL + index for index, kind in enumerate(power_up_types)}
+        self.entity_labels[FOOD_ENTITY] = FOOD
+        self.entity_labels[WALL] = POWER_UP_LABEL + len(power_up_types)
+        
+        rows = np.arange(self.shape[0])
+        self.cell_index = (rows // self.cell_size)[:, None] * width + np.arange(width)[None, :]
+        self.tile_row = (rows % self.cell_size)[:, None]
+        self.cell_labels = np.zeros(width * height, dtype=np.intp)
+        self.row_labels = np.empty((self.shape[0], width), dtype=np.intp)
+        self.occupied = np.empty(width * height, dtype=bool)
+    
+    @classmethod
+    def for_game(cls, game, cell_size=None, particles=False):
+        if getattr(game, 'camera', None) is not None:
+            raise ValueError("arena games keep sparse occupancy and cannot be rendered to pixels")
+        body = game.snake.positions
+        return cls(sys.modules[type(game).__module__], body.width, body.height, cell_size, particles)
+    
+    def tile(self, sprite):
+        if self.cell_size != sprite.get_width():
+            sprite = pygame.transform.smoothscale(sprite, (self.cell_size, self.cell_size))
+        return pygame.surfarray.array3d(sprite).transpose(1, 0, 2).reshape(self.cell_size, self.cell_size * 3)
+    
+    def labels(self, game):
+        labels = self.cell_labels
+        snake = game.snake
+        body, head = (GHOST_BODY, GHOST_HEAD) if getattr(snake, 'ghost_mode', False) else (BODY, HEAD)
+        np.not_equal(np.frombuffer(snake.positions.occupancy, dtype=np.uint16), 0, out=self.occupied)
+        np.multiply(self.occupied, body, out=labels)
+        x, y = snake.positions[0]
+        labels[y * self.width + x] = head
+        if self.enhanced:
+            for cell, entity in game.entities.cells.items():
+                labels[cell] = self.entity_labels[entity.kind]
+        elif game.food.position is not None:
+            x, y = game.food.position
+            labels[y * self.width + x] = FOOD
+        return labels.reshape(self.height, self.width)
+    
+    def render(self, game, out=None):
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        self.labels(game)
+        row_labels = self.row_labels
+        np.take(self.cell_labels, self.cell_index, out=row_labels, mode='clip')
+        row_labels *= self.cell_size
+        row_labels += self.tile_row
+        np.take(self.tiles, row_labels, axis=0, out=out.reshape(self.shape[0], self.width, -1), mode='clip')
+        if self.particles and game.particles.count:
+            self.draw_particles(game.particles, out)
+        return out
+    
+    def render_batch(self, games, out=None):
+        if out is None:
+            out = np.empty((len(games), *self.shape), dtype=np.uint8)
+        for index, game in enumerate(games):
+            self.render(game, out[index])
+        return out
+    
+    def draw_particles(self, particles, out):
+        count = particles.count
+        x = particles.x[:count] * self.scale
+        y = particles.y[:count] * self.scale
+        radius = np.maximum(particles.size[:count] * self.scale, 0.5)
+        alpha_steps = (particles.life[:count] * (ALPHA_STEPS - 1) + PARTICLE_LIFE - 1) // PARTICLE_LIFE
+        palette = np.array(particles.palette, dtype=np.float32)
+        colors = (palette[particles.color[:count]] * (alpha_steps / (ALPHA_STEPS - 1))[:, None]).astype(np.uint8)
+        height, width = self.shape[:2]
+        reach = int(np.ceil(radius.max()))
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                inside = dx * dx + dy * dy <= radius * radius
+                px = (x[inside] + dx).astype(np.intp)
+                py = (y[inside] + dy).astype(np.intp)
+                visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                px, py = px[visible], py[visible]
+                empty = self.row_labels[py, px // self.cell_size] < self.cell_size
+                px, py = px[empty], py[empty]
+                out[py, px] = np.maximum(out[py, px], colors[inside][visible][empty])
\ No newline at end of file
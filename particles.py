@@ -0,0 +1,124 @@
+import numpy as np
+import pygame
+
+from render_cache import LRUCache
+
+PARTICLE_LIFE = 30
+GRAVITY = 0.1
+MAX_SPEED = 3
+MIN_SIZE = 2
+MAX_SIZE = 5
+SIZE_STEPS = 2
+ALPHA_STEPS = 16
+MAX_SPRITES = 1024
+
+class ParticleSystem:
+    def __init__(self, capacity=4096, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.velocity_x = np.zeros(capacity, dtype=np.float32)
+        self.velocity_y = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = LRUCache(MAX_SPRITES)
+    
+    def __len__(self):
+        return self.count
+    
+    def _color_index(self, color):
+        index = self.palette_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self.palette_index[color] = index
+        return index
+    
+    def emit(self, x, y, color, count=15):
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        start = self.count
+        end = start + count
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.velocity_x[start:end] = self.rng.uniform(-MAX_SPEED, MAX_SPEED, count)
+        self.velocity_y[start:end] = self.rng.uniform(-MAX_SPEED, MAX_SPEED, count)
+        self.life[start:end] = PARTICLE_LIFE
+        self.size[start:end] = self.rng.uniform(MIN_SIZE, MAX_SIZE, count)
+        self.color[start:end] = self._color_index(color)
+        self.count = end
+    
+    def clear(self):
+        self.count = 0
+    
+    def update(self):
+        count = self.count
+        if count == 0:
+            return
+        self.x[:count] += self.velocity_x[:count]
+        self.y[:count] += self.velocity_y[:count]
+        self.velocity_y[:count] += GRAVITY
+        self.life[:count] -= 1
+        
+        alive = self.life[:count] > 0
+        remaining = int(np.count_nonzero(alive))
+        if remaining < count:
+            for values in (self.x, self.y, self.velocity_x, self.velocity_y, self.life, self.size, self.color):
+                values[:remaining] = values[:count][alive]
+            self.count = remaining
+    
+    def _render_sprite(self, color_index, size_step, alpha_step):
+        size = size_step / SIZE_STEPS
+        alpha = alpha_step * 255 // (ALPHA_STEPS - 1)
+        sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*self.palette[color_index], alpha), (size, size), size)
+        return sprite
+    
+    def render_positions(self, alpha=1.0):
+        count = self.count
+        if alpha >= 1.0:
+            return self.x[:count], self.y[:count]
+        lag = 1.0 - alpha
+        x = self.x[:count] - self.velocity_x[:count] * lag
+        y = self.y[:count] - (self.velocity_y[:count] - GRAVITY) * lag
+        return x, y
+    
+    def bounds(self, alpha=1.0):
+        count = self.count
+        if count == 0:
+            return None
+        x, y = self.render_positions(alpha)
+        size = self.size[:count] + 1
+        left = int((x - size).min()) - 1
+        top = int((y - size).min()) - 1
+        right = int((x + size).max()) + 1
+        bottom = int((y + size).max()) + 1
+        return pygame.Rect(left, top, right - left, bottom - top)
+    
+    def get_sprite(self, color_index, size_step, alpha_step):
+        return self.sprites.get_or_create((color_index, size_step, alpha_step), self._render_sprite,
+                                          color_index, size_step, alpha_step)
+    
+    def draw(self, screen, alpha=1.0):
+        count = self.count
+        if count == 0:
+            return
+        x, y = self.render_positions(alpha)
+        size_steps = np.rint(self.size[:count] * SIZE_STEPS).astype(np.int32)
+        alpha_steps = (self.life[:count] * (ALPHA_STEPS - 1) + PARTICLE_LIFE - 1) // PARTICLE_LIFE
+        sizes = size_steps / SIZE_STEPS
+        left = (x - sizes).astype(np.int32).tolist()
+        top = (y - sizes).astype(np.int32).tolist()
+        
+        get_sprite = self.get_sprite
+        screen.blits([
+            (get_sprite(color, size_step, alpha_step), (x, y))
+            for color, size_step, alpha_step, x, y
+            in zip(self.color[:count].tolist(), size_steps.tolist(), alpha_steps.tolist(), left, top)
+        ], False)
\ No newline at end of file
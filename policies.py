@@ -0,0 +1,69 @@
+import random
+
+from autopilot import Autopilot
+from entities import WALL
+
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+def next_cell(snake, direction):
+    head = snake.positions[0]
+    cell = (head[0] + direction[0], head[1] + direction[1])
+    if getattr(snake, 'ghost_mode', False):
+        return (cell[0] % snake.positions.width, cell[1] % snake.positions.height)
+    return cell
+
+def is_wall(entities, cell):
+    entity = entities.at(cell) if entities is not None else None
+    return entity is not None and entity.kind == WALL
+
+def is_safe(snake, cell, entities=None):
+    ghost = getattr(snake, 'ghost_mode', False)
+    body = snake.positions
+    if not ghost and (cell[0] < 0 or cell[0] >= body.width or cell[1] < 0 or cell[1] >= body.height):
+        return False
+    if is_wall(entities, cell):
+        return False
+    return ghost or cell not in body
+
+def safe_moves(snake, entities=None):
+    reverse = (-snake.direction[0], -snake.direction[1])
+    moves = []
+    for direction in DIRECTIONS:
+        if direction == reverse:
+            continue
+        cell = next_cell(snake, direction)
+        if is_safe(snake, cell, entities):
+            moves.append((direction, cell))
+    return moves
+
+class RandomPolicy:
+    def __init__(self, game, turn_chance=0.2):
+        self.rng = random.Random(game.seed)
+        self.turn_chance = turn_chance
+    
+    def __call__(self, game):
+        moves = safe_moves(game.snake, getattr(game, 'entities', None))
+        if not moves:
+            return None
+        for direction, _ in moves:
+            if direction == game.snake.direction and self.rng.random() > self.turn_chance:
+                return direction
+        return self.rng.choice(moves)[0]
+
+class GreedyPolicy:
+    def __init__(self, game):
+        pass
+    
+    def __call__(self, game):
+        food = game.food.position
+        moves = safe_moves(game.snake, getattr(game, 'entities', None))
+        if not moves or food is None:
+            return None
+        best = min(moves, key=lambda move: (abs(move[1][0] - food[0]) + abs(move[1][1] - food[1]), move[0] != game.snake.direction))
+        return best[0]
+
+POLICIES = {
+    'random': RandomPolicy,
+    'greedy': GreedyPolicy,
+    'autopilot': Autopilot,
+}
\ No newline at end of file
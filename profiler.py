@@ -0,0 +1,163 @@
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+from subsystems import init_font
+
+FRAME_HISTORY = 600
+EVENT_HISTORY = 20000
+OVERLAY_REFRESH = 30
+OVERLAY_KEY = pygame.K_F3
+EXPORT_KEY = pygame.K_F12
+
+class RingBuffer:
+    def __init__(self, capacity=FRAME_HISTORY):
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+    
+    def percentiles(self, q=(50, 95, 99)):
+        if self.count == 0:
+            return None
+        return np.percentile(self.values[:self.count], q)
+
+class NullSection:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = NullSection()
+
+class Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+class FrameProfiler:
+    def __init__(self, enabled=False, history=FRAME_HISTORY, inputs=None):
+        self.enabled = enabled
+        self.history = history
+        self.inputs = inputs
+        self.overlay = False
+        self.phases = {}
+        self.events = deque(maxlen=EVENT_HISTORY)
+        self.frame = 0
+        self.frame_start = None
+        self.origin = time.perf_counter()
+        self.overlay_surface = None
+        self.font = None
+    
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+    
+    def record(self, name, start, end):
+        ring = self.phases.get(name)
+        if ring is None:
+            ring = self.phases[name] = RingBuffer(self.history)
+        ring.append(end - start)
+        self.events.append((self.frame, name, start, end))
+    
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+    
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.record('frame', self.frame_start, time.perf_counter())
+        self.frame += 1
+        if self.overlay and self.frame % OVERLAY_REFRESH == 1:
+            self.refresh_overlay()
+    
+    def toggle_overlay(self):
+        self.enabled = True
+        self.overlay = not self.overlay
+        self.overlay_surface = None
+    
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == OVERLAY_KEY:
+            self.toggle_overlay()
+            return True
+        if event.key == EXPORT_KEY and self.enabled:
+            self.export_chrome_trace('snake_profile.json')
+            self.export_csv('snake_profile.csv')
+            return True
+        return False
+    
+    def stats(self):
+        stats = {}
+        for name, ring in self.phases.items():
+            p50, p95, p99 = ring.percentiles()
+            stats[name] = {'samples': len(ring), 'p50_ms': p50 * 1000, 'p95_ms': p95 * 1000, 'p99_ms': p99 * 1000}
+        return stats
+    
+    def summary_lines(self):
+        lines = [f"{'phase':<18}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, values in sorted(self.stats().items()):
+            lines.append(f"{name:<18}{values['p50_ms']:7.2f}{values['p95_ms']:7.2f}{values['p99_ms']:7.2f}")
+        latency = self.inputs.latency_stats() if self.inputs is not None else None
+        if latency is not None:
+            lines.append(f"{'input p50/p99':<18}{latency['p50']:7d}{latency['p99']:14d}  dropped {latency['dropped']}")
+        return lines
+    
+    def refresh_overlay(self):
+        if self.font is None:
+            init_font()
+            self.font = pygame.font.SysFont('monospace', 14)
+        line_height = self.font.get_linesize()
+        lines = [self.font.render(line, True, (255, 255, 255)) for line in self.summary_lines()]
+        width = max(line.get_width() for line in lines) + 12
+        self.overlay_surface = pygame.Surface((width, line_height * len(lines) + 12), pygame.SRCALPHA)
+        self.overlay_surface.fill((0, 0, 0, 180))
+        for i, line in enumerate(lines):
+            self.overlay_surface.blit(line, (6, 6 + i * line_height))
+    
+    def draw_overlay(self, screen):
+        if self.overlay_surface is None:
+            self.refresh_overlay()
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 10, 10))
+    
+    def trace_events(self):
+        for frame, name, start, end in self.events:
+            yield frame, name, (start - self.origin) * 1e6, (end - start) * 1e6
+    
+    def export_chrome_trace(self, path):
+        events = [
+            {'name': name, 'ph': 'X', 'ts': start, 'dur': duration, 'pid': 0, 'tid': 0, 'args': {'frame': frame}}
+            for frame, name, start, duration in self.trace_events()
+        ]
+        with open(path, 'w') as output:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, output)
+    
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(['frame', 'phase', 'start_us', 'duration_us'])
+            for frame, name, start, duration in self.trace_events():
+                writer.writerow([frame, name, f"{start:.1f}", f"{duration:.1f}"])
\ No newline at end of file
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import pygame
+
+from subsystems import init_font
+
+class LRUCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, key):
+        return key in self.entries
+    
+    def get(self, key, default=None):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+    
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def get_or_create(self, key, factory, *args):
+        value = self.get(key)
+        if value is None:
+            value = factory(*args)
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+def load_font(name, size):
+    init_font()
+    return pygame.font.Font(name, size)
+
+class RenderCache:
+    def __init__(self, max_fonts=8, max_text=256, max_sprites=512):
+        self.fonts = LRUCache(max_fonts)
+        self.text_surfaces = LRUCache(max_text)
+        self.sprites = LRUCache(max_sprites)
+    
+    def font(self, size, name=None):
+        return self.fonts.get_or_create((name, size), load_font, name, size)
+    
+    def _render_text(self, text, size, color, name):
+        return self.font(size, name).render(text, True, color)
+    
+    def text(self, text, size, color, name=None):
+        return self.text_surfaces.get_or_create((text, size, color, name), self._render_text, text, size, color, name)
+    
+    def sprite(self, key, factory, *args):
+        return self.sprites.get_or_create(key, factory, *args)
+    
+    def clear(self):
+        self.fonts.clear()
+        self.text_surfaces.clear()
+        self.sprites.clear()
+    
+    def stats(self):
+        return {
+            'fonts': self.fonts.stats(),
+            'text': self.text_surfaces.stats(),
+            'sprites': self.sprites.stats(),
+        }
\ No newline at end of file
@@ -0,0 +1,186 @@
+import argparse
+import importlib
+import struct
+import sys
+import time
+
+MAGIC = b'SNKR'
+VERSION = 2
+GAMES = ('snake_game', 'snake_enhanced')
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+INITIAL_DIRECTION = DIRECTION_CODES[(1, 0)]
+HEADERS = {1: struct.Struct('<4sBBQHHHII'), 2: struct.Struct('<4sBBQHHHIIB')}
+ARENA_FLAG = 1
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    def __init__(self, game, seed, width, height, tick_rate, inputs=None, ticks=0, score=0, arena=False):
+        self.game = game
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.arena = arena
+        self.inputs = inputs if inputs is not None else []
+        self.ticks = ticks
+        self.score = score
+        self.last_code = self.inputs[-1][1] if self.inputs else INITIAL_DIRECTION
+    
+    def record(self, tick, direction):
+        code = DIRECTION_CODES[direction]
+        if code != self.last_code:
+            self.inputs.append((tick, code))
+            self.last_code = code
+    
+    def finish(self, ticks, score):
+        self.ticks = ticks
+        self.score = score
+    
+    def input_map(self):
+        return {tick: DIRECTIONS[code] for tick, code in self.inputs}
+    
+    def to_bytes(self):
+        flags = ARENA_FLAG if self.arena else 0
+        out = bytearray(HEADERS[VERSION].pack(MAGIC, VERSION, GAMES.index(self.game), self.seed,
+                                              self.width, self.height, self.tick_rate, self.ticks, self.score, flags))
+        last_tick = 0
+        for tick, code in self.inputs:
+            write_varint(out, (tick - last_tick) << 2 | code)
+            last_tick = tick
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version = struct.unpack_from('<4sB', data)
+        if magic != MAGIC or version not in HEADERS:
+            raise ValueError("not a snake replay")
+        header = HEADERS[version]
+        magic, version, game, seed, width, height, tick_rate, ticks, score, *flags = header.unpack_from(data)
+        arena = bool(flags[0] & ARENA_FLAG) if flags else None
+        inputs = []
+        tick = 0
+        offset = header.size
+        while offset < len(data):
+            value, offset = read_varint(data, offset)
+            tick += value >> 2
+            inputs.append((tick, value & 3))
+        return cls(GAMES[game], seed, width, height, tick_rate, inputs, ticks, score, arena)
+
+def write_replays(path, replays, mode='ab'):
+    with open(path, mode) as archive:
+        for replay in replays:
+            data = replay.to_bytes()
+            prefix = bytearray()
+            write_varint(prefix, len(data))
+            archive.write(prefix)
+            archive.write(data)
+
+def read_replays(path):
+    with open(path, 'rb') as archive:
+        data = archive.read()
+    offset = 0
+    while offset < len(data):
+        length, offset = read_varint(data, offset)
+        yield Replay.from_bytes(data[offset:offset + length])
+        offset += length
+
+def load_game(replay, **options):
+    module = importlib.import_module(replay.game)
+    if module.TICK_RATE != replay.tick_rate:
+        raise ValueError(f"replay tick rate {replay.tick_rate} does not match {replay.game}")
+    arena = replay.arena
+    if arena is None:
+        arena = (module.GRID_WIDTH, module.GRID_HEIGHT) != (replay.width, replay.height)
+    if arena:
+        options['arena'] = (replay.width, replay.height)
+    return module.Game(seed=replay.seed, **options)
+
+def step(game, inputs):
+    direction = inputs.get(game.tick)
+    if direction is not None:
+        game.snake.change_direction(direction)
+    return game.update()
+
+def simulate(replay):
+    game = load_game(replay, headless=True)
+    inputs = replay.input_map()
+    while game.tick < replay.ticks and step(game, inputs):
+        pass
+    return game
+
+def verify(replay):
+    game = simulate(replay)
+    return game.score == replay.score and game.tick == replay.ticks
+
+def play(replay, speed=1.0, fps=None):
+    import pygame
+    
+    game = load_game(replay, **({} if fps is None else {'render_fps': fps}))
+    inputs = replay.input_map()
+    game.timestep.set_tick_rate(replay.tick_rate * speed)
+    running = True
+    while running and game.tick < replay.ticks:
+        elapsed = game.clock.tick(game.render_fps) / 1000
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        
+        game.timestep.add_time(elapsed)
+        while running and game.tick < replay.ticks and game.timestep.consume():
+            running = step(game, inputs)
+            multiplier = getattr(game.snake, 'speed_multiplier', 1.0)
+            game.timestep.set_tick_rate(replay.tick_rate * speed * multiplier)
+        game.draw(game.timestep.alpha)
+    pygame.quit()
+    return game
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or play back recorded snake games")
+    parser.add_argument('command', choices=['verify', 'play'])
+    parser.add_argument('archive')
+    parser.add_argument('--index', type=int, default=0)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--fps', type=int, help="render frame rate (default: the game's RENDER_FPS)")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'play':
+        for index, replay in enumerate(read_replays(args.archive)):
+            if index == args.index:
+                game = play(replay, args.speed, args.fps)
+                print(f"score {game.score} (recorded {replay.score})")
+                return 0
+        print(f"no replay at index {args.index}")
+        return 1
+    
+    start = time.perf_counter()
+    games = ticks = failures = 0
+    for replay in read_replays(args.archive):
+        games += 1
+        ticks += replay.ticks
+        if not verify(replay):
+            failures += 1
+            print(f"replay {games - 1}: score mismatch (recorded {replay.score}, seed {replay.seed})")
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {ticks} ticks, {failures} failures in {elapsed:.2f}s "
+          f"({ticks / elapsed if elapsed else 0:.0f} ticks/s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
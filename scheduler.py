@@ -0,0 +1,44 @@
+import heapq
+from itertools import count
+
+class TickScheduler:
+    def __init__(self):
+        self.queue = []
+        self.sequence = count()
+        self.pending = 0
+    
+    def __len__(self):
+        return self.pending
+    
+    def schedule(self, tick, callback, *args):
+        event = [tick, next(self.sequence), callback, args]
+        heapq.heappush(self.queue, event)
+        self.pending += 1
+        return event
+    
+    def cancel(self, event):
+        if event is None or event[2] is None:
+            return False
+        event[2] = None
+        self.pending -= 1
+        return True
+    
+    def run_due(self, tick):
+        queue = self.queue
+        fired = 0
+        while queue and queue[0][0] <= tick:
+            event = heapq.heappop(queue)
+            callback = event[2]
+            if callback is None:
+                continue
+            event[2] = None
+            self.pending -= 1
+            callback(*event[3])
+            fired += 1
+        return fired
+    
+    def clear(self):
+        for event in self.queue:
+            event[2] = None
+        self.queue.clear()
+        self.pending = 0
\ No newline at end of file
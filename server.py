@@ -0,0 +1,574 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+from entities import FOOD, EntityStore
+from free_cells import FreeCellIndex
+from input_buffer import InputBuffer
+from profiler import RingBuffer
+from replay import DIRECTIONS, read_varint, write_varint
+from scheduler import TickScheduler
+from snake_body import SnakeBody
+from snake_enhanced import DOUBLE_POINTS_TICKS, GHOST_TICKS, POWER_UP_SPAWN_TICKS, POWER_UP_TYPES, PowerUp
+from snake_game import TICK_RATE, Food
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7777
+ROOM_WIDTH = 80
+ROOM_HEIGHT = 60
+ROOM_CAPACITY = 64
+FOOD_COUNT = 8
+RESPAWN_TICKS = 2 * TICK_RATE
+MAX_MESSAGE = 256
+MAX_ROOM_NAME = 64
+MAX_WRITE_BUFFER = 1 << 18
+STATS_INTERVAL = 5.0
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+JOIN = ord('J')
+TURN = ord('D')
+WELCOME = ord('W')
+TICK = ord('T')
+
+OP_HEAD, OP_TAIL, OP_SPAWN, OP_DIE, OP_ENTITY, OP_REMOVE, OP_SCORE = range(7)
+FOOD_KIND = 0
+TIMESTAMP = struct.Struct('<d')
+
+def entity_code(kind):
+    return FOOD_KIND if kind == FOOD else 1 + POWER_UP_TYPES.index(kind)
+
+class Player:
+    def __init__(self, player_id, connection):
+        self.id = player_id
+        self.connection = connection
+        self.welcomed = False
+        self.body = None
+        self.direction = (1, 0)
+        self.inputs = InputBuffer()
+        self.score = 0
+        self.alive = False
+        self.respawn_tick = 0
+        self.grow = False
+        self.speed = 1.0
+        self.budget = 0.0
+        self.ghost_end_tick = -1
+        self.double_points_end_tick = -1
+
+class Room:
+    def __init__(self, name, width=ROOM_WIDTH, height=ROOM_HEIGHT, capacity=ROOM_CAPACITY, seed=None):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.rng = random.Random(seed)
+        self.free_cells = FreeCellIndex(width, height)
+        self.occupancy = array('H', bytes(2 * width * height))
+        self.players = {}
+        self.joining = []
+        self.leaving = []
+        self.entities = EntityStore(width, height, self.free_cells)
+        self.next_player_id = 1
+        self.tick = 0
+        self.scheduler = TickScheduler()
+        self.next_power_up_tick = self.rng.randint(*POWER_UP_SPAWN_TICKS)
+        self.scheduler.schedule(self.next_power_up_tick, self.spawn_power_up)
+        self.ops = bytearray()
+        self.op_count = 0
+        self.top_up_food()
+    
+    @property
+    def empty(self):
+        return not self.players and not self.joining
+    
+    def cell(self, position):
+        return position[1] * self.width + position[0]
+    
+    def emit(self, op, *values):
+        self.ops.append(op)
+        for value in values:
+            write_varint(self.ops, value)
+        self.op_count += 1
+    
+    def join(self, connection):
+        if len(self.players) + len(self.joining) >= self.capacity:
+            return None
+        player = Player(self.next_player_id, connection)
+        self.next_player_id += 1
+        self.joining.append(player)
+        return player
+    
+    def leave(self, player):
+        if player in self.joining:
+            self.joining.remove(player)
+        else:
+            self.leaving.append(player)
+    
+    def spawn(self, player):
+        position = self.free_cells.sample(self.rng)
+        if position is None:
+            player.respawn_tick = self.tick + RESPAWN_TICKS
+            return
+        player.body = SnakeBody(self.width, self.height, [position], self.free_cells, self.occupancy)
+        player.direction = self.rng.choice(DIRECTIONS)
+        player.inputs.clear()
+        player.alive = True
+        player.score = 0
+        player.grow = False
+        player.speed = 1.0
+        player.budget = 0.0
+        player.ghost_end_tick = -1
+        player.double_points_end_tick = -1
+        self.emit(OP_SPAWN, player.id, self.cell(position))
+    
+    def kill(self, player):
+        player.alive = False
+        player.body.truncate(0)
+        player.respawn_tick = self.tick + RESPAWN_TICKS
+        self.emit(OP_DIE, player.id)
+    
+    def add_entity(self, entity, kind):
+        if self.entities.add(entity, kind) is None:
+            return
+        if kind != FOOD:
+            entity.expiry = self.scheduler.schedule(entity.expiry_tick(), self.remove_entity, entity, True)
+        self.emit(OP_ENTITY, entity.id, entity_code(kind), self.cell(entity.position))
+    
+    def remove_entity(self, entity, release):
+        self.entities.remove(entity, release)
+        if entity.kind != FOOD:
+            self.scheduler.cancel(entity.expiry)
+        self.emit(OP_REMOVE, entity.id)
+        return entity
+    
+    def spawn_power_up(self):
+        power_up = PowerUp(self.free_cells, self.rng, self.tick)
+        self.add_entity(power_up, power_up.type)
+        self.next_power_up_tick = self.tick + self.rng.randint(*POWER_UP_SPAWN_TICKS)
+        self.scheduler.schedule(self.next_power_up_tick, self.spawn_power_up)
+    
+    def top_up_food(self):
+        while self.entities.count(FOOD) < FOOD_COUNT and not self.free_cells.full:
+            self.add_entity(Food(self.free_cells, self.rng), FOOD)
+    
+    def pick_up(self, player, entity):
+        self.remove_entity(entity, release=False)
+        if entity.kind == FOOD:
+            player.grow = True
+            player.score += 20 if player.double_points_end_tick >= self.tick else 10
+            self.emit(OP_SCORE, player.id, player.score)
+        else:
+            self.apply_power_up(player, entity.type)
+    
+    def apply_power_up(self, player, power_type):
+        if power_type == 'speed':
+            player.speed = 2.0
+        elif power_type == 'slow':
+            player.speed = 0.5
+        elif power_type == 'ghost':
+            player.ghost_end_tick = self.tick + GHOST_TICKS
+        elif power_type == 'double_points':
+            player.double_points_end_tick = self.tick + DOUBLE_POINTS_TICKS
+        elif power_type == 'shrink' and len(player.body) > 3:
+            removed = len(player.body) - len(player.body) // 2
+            player.body.truncate(len(player.body) // 2)
+            self.emit(OP_TAIL, player.id, removed)
+    
+    def move(self, players):
+        heads = {}
+        for player in players:
+            head = player.body.head
+            x = head[0] + player.direction[0]
+            y = head[1] + player.direction[1]
+            if player.ghost_end_tick >= self.tick:
+                x %= self.width
+                y %= self.height
+            elif x < 0 or x >= self.width or y < 0 or y >= self.height:
+                self.kill(player)
+                continue
+            heads[player] = (x, y)
+        
+        claimed = {}
+        for player, position in heads.items():
+            claimed[position] = claimed.get(position, 0) + 1
+            if player.grow:
+                player.grow = False
+            else:
+                player.body.pop_tail()
+                self.emit(OP_TAIL, player.id, 1)
+        
+        for player, position in heads.items():
+            cell = self.cell(position)
+            if player.ghost_end_tick < self.tick and (claimed[position] > 1 or self.occupancy[cell]):
+                self.kill(player)
+                continue
+            player.body.push_head(position)
+            self.emit(OP_HEAD, player.id, cell)
+            entity = self.entities.get(cell)
+            if entity is not None:
+                self.pick_up(player, entity)
+    
+    def step(self, now):
+        self.tick += 1
+        for player in self.leaving:
+            if player.alive:
+                self.kill(player)
+            del self.players[player.id]
+        self.leaving.clear()
+        for player in self.joining:
+            self.players[player.id] = player
+            self.spawn(player)
+        self.joining.clear()
+        
+        movers = []
+        most = 0
+        for player in self.players.values():
+            if not player.alive:
+                if self.tick >= player.respawn_tick:
+                    self.spawn(player)
+                continue
+            direction = player.inputs.pop(now)
+            if direction is not None:
+                player.direction = direction
+            player.budget += player.speed
+            moves = int(player.budget)
+            player.budget -= moves
+            if moves:
+                movers.append((player, moves))
+                most = max(most, moves)
+        for move in range(most):
+            self.move([player for player, moves in movers if moves > move and player.alive])
+        
+        self.scheduler.run_due(self.tick)
+        self.top_up_food()
+    
+    def delta(self, timestamp):
+        payload = bytearray((TICK,))
+        write_varint(payload, self.tick)
+        payload += TIMESTAMP.pack(timestamp)
+        write_varint(payload, self.op_count)
+        payload += self.ops
+        self.ops = bytearray()
+        self.op_count = 0
+        return bytes(payload)
+    
+    def snapshot(self, player_id):
+        payload = bytearray((WELCOME,))
+        alive = [player for player in self.players.values() if player.alive]
+        for value in (player_id, self.width, self.height, self.tick, len(alive)):
+            write_varint(payload, value)
+        for player in alive:
+            write_varint(payload, player.id)
+            write_varint(payload, player.score)
+            write_varint(payload, len(player.body))
+            for position in player.body:
+                write_varint(payload, self.cell(position))
+        write_varint(payload, len(self.entities))
+        for entity in self.entities:
+            write_varint(payload, entity.id)
+            write_varint(payload, entity_code(entity.kind))
+            write_varint(payload, self.cell(entity.position))
+        return bytes(payload)
+    
+    def broadcast(self, timestamp):
+        delta = self.delta(timestamp)
+        frames = {}
+        for player in self.players.values():
+            connection = player.connection
+            if not player.welcomed:
+                connection.send(self.snapshot(player.id))
+                player.welcomed = True
+                continue
+            framing = type(connection)
+            frame = frames.get(framing)
+            if frame is None:
+                frame = frames[framing] = connection.frame(delta)
+            connection.write(frame)
+
+class WorldView:
+    def __init__(self):
+        self.player_id = None
+        self.width = 0
+        self.height = 0
+        self.tick = 0
+        self.snakes = {}
+        self.scores = {}
+        self.entities = {}
+    
+    def apply(self, payload):
+        if payload[0] == WELCOME:
+            return self.apply_snapshot(payload)
+        if payload[0] == TICK:
+            return self.apply_delta(payload)
+        return None
+    
+    def apply_snapshot(self, payload):
+        values = self.values(payload, 1)
+        self.player_id, self.width, self.height, self.tick, count = (next(values) for _ in range(5))
+        self.snakes.clear()
+        self.scores.clear()
+        self.entities.clear()
+        for _ in range(count):
+            snake_id = next(values)
+            self.scores[snake_id] = next(values)
+            self.snakes[snake_id] = deque(next(values) for _ in range(next(values)))
+        for _ in range(next(values)):
+            entity_id = next(values)
+            self.entities[entity_id] = (next(values), next(values))
+        return None
+    
+    def apply_delta(self, payload):
+        self.tick, offset = read_varint(payload, 1)
+        timestamp = TIMESTAMP.unpack_from(payload, offset)[0]
+        values = self.values(payload, offset + TIMESTAMP.size)
+        for _ in range(next(values)):
+            op = next(values)
+            if op == OP_HEAD:
+                snake_id = next(values)
+                self.snakes[snake_id].appendleft(next(values))
+            elif op == OP_TAIL:
+                snake = self.snakes[next(values)]
+                for _ in range(next(values)):
+                    snake.pop()
+            elif op == OP_SPAWN:
+                snake_id = next(values)
+                self.snakes[snake_id] = deque((next(values),))
+                self.scores[snake_id] = 0
+            elif op == OP_DIE:
+                del self.snakes[next(values)]
+            elif op == OP_ENTITY:
+                entity_id = next(values)
+                self.entities[entity_id] = (next(values), next(values))
+            elif op == OP_REMOVE:
+                del self.entities[next(values)]
+            elif op == OP_SCORE:
+                snake_id = next(values)
+                self.scores[snake_id] = next(values)
+        return timestamp
+    
+    def values(self, payload, offset):
+        while offset < len(payload):
+            value, offset = read_varint(payload, offset)
+            yield value
+
+class TcpConnection:
+    def __init__(self, reader, writer, pending=b'', limit=MAX_MESSAGE):
+        self.reader = reader
+        self.writer = writer
+        self.pending = pending
+        self.limit = limit
+    
+    @staticmethod
+    def frame(payload):
+        out = bytearray()
+        write_varint(out, len(payload))
+        out += payload
+        return bytes(out)
+    
+    def write(self, frame):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            transport.abort()
+            return
+        transport.write(frame)
+    
+    def send(self, payload):
+        self.write(self.frame(payload))
+    
+    async def receive(self):
+        length = 0
+        shift = 0
+        while True:
+            if self.pending:
+                byte = self.pending[0]
+                self.pending = self.pending[1:]
+            else:
+                byte = (await self.reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        if self.limit is not None and length > self.limit:
+            raise ConnectionError(f"message of {length} bytes exceeds {self.limit}")
+        return await self.reader.readexactly(length)
+
+class WebSocketConnection(TcpConnection):
+    @staticmethod
+    def frame(payload, opcode=0x2):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        return header + payload
+    
+    async def handshake(self):
+        request = self.pending + await self.reader.readuntil(b'\r\n\r\n')
+        self.pending = b''
+        key = None
+        for line in request.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'sec-websocket-key':
+                key = value.strip()
+        if key is None:
+            raise ConnectionError("websocket upgrade without Sec-WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest())
+        self.writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                          b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+    
+    async def receive(self):
+        while True:
+            first, second = await self.reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            if self.limit is not None and length > self.limit:
+                raise ConnectionError(f"message of {length} bytes exceeds {self.limit}")
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            data = await self.reader.readexactly(length)
+            if mask is not None:
+                data = bytes(byte ^ mask[index % 4] for index, byte in enumerate(data))
+            if opcode == 0x8:
+                self.write(self.frame(b'', 0x8))
+                return None
+            if opcode == 0x9:
+                self.write(self.frame(data, 0xA))
+            elif opcode in (0x0, 0x1, 0x2):
+                return data
+
+class Server:
+    def __init__(self, width=ROOM_WIDTH, height=ROOM_HEIGHT, capacity=ROOM_CAPACITY, tick_rate=TICK_RATE, seed=None):
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.rooms = {}
+        self.connections = 0
+        self.tick_times = RingBuffer()
+        self.overruns = 0
+    
+    def room(self, name):
+        room = self.rooms.get(name)
+        if room is None:
+            seed = f"{self.seed}:{name}" if self.seed is not None else None
+            room = self.rooms[name] = Room(name, self.width, self.height, self.capacity, seed)
+        return room
+    
+    async def handle(self, reader, writer):
+        self.connections += 1
+        room = None
+        player = None
+        try:
+            first = await reader.readexactly(1)
+            if first == b'G':
+                connection = WebSocketConnection(reader, writer, first)
+                await connection.handshake()
+            else:
+                connection = TcpConnection(reader, writer, first)
+            while True:
+                payload = await connection.receive()
+                if not payload:
+                    break
+                if payload[0] == JOIN and player is None:
+                    room = self.room(payload[1:1 + MAX_ROOM_NAME].decode('utf-8', 'replace'))
+                    player = room.join(connection)
+                    if player is None:
+                        break
+                elif payload[0] == TURN and player is not None and len(payload) > 1 and payload[1] < len(DIRECTIONS):
+                    player.inputs.push(DIRECTIONS[payload[1]], time.monotonic() * 1000, player.direction)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            if player is not None:
+                room.leave(player)
+            writer.close()
+    
+    def step(self):
+        now = time.monotonic() * 1000
+        timestamp = time.time()
+        for name, room in list(self.rooms.items()):
+            if room.empty:
+                del self.rooms[name]
+                continue
+            room.step(now)
+            room.broadcast(timestamp)
+    
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            started = time.perf_counter()
+            self.step()
+            self.tick_times.append(time.perf_counter() - started)
+            deadline += interval
+            delay = deadline - loop.time()
+            if delay < 0:
+                self.overruns += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+    
+    def stats(self):
+        players = sum(len(room.players) for room in self.rooms.values())
+        line = f"rooms={len(self.rooms)} players={players} connections={self.connections} overruns={self.overruns}"
+        percentiles = self.tick_times.percentiles((50, 99, 100))
+        if percentiles is not None:
+            p50, p99, worst = (value * 1000 for value in percentiles)
+            line += f" tick p50={p50:.2f}ms p99={p99:.2f}ms max={worst:.2f}ms"
+        return line
+    
+    async def report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.stats(), flush=True)
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT, stats_interval=STATS_INTERVAL):
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"serving on {host}:{port} at {server.tick_rate} ticks/s", flush=True)
+    tasks = [asyncio.create_task(server.run_ticks())]
+    if stats_interval > 0:
+        tasks.append(asyncio.create_task(server.report(stats_interval)))
+    async with listener:
+        await asyncio.gather(listener.serve_forever(), *tasks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Authoritative multiplayer snake server (TCP and WebSocket on one port)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--width', type=int, default=ROOM_WIDTH, help="room board width in cells")
+    parser.add_argument('--height', type=int, default=ROOM_HEIGHT, help="room board height in cells")
+    parser.add_argument('--capacity', type=int, default=ROOM_CAPACITY, help="players per room")
+    parser.add_argument('--tick-rate', type=float, default=TICK_RATE)
+    parser.add_argument('--seed', type=int, help="seed every room's RNG from this value and the room name")
+    parser.add_argument('--stats', type=float, default=STATS_INTERVAL, metavar='SECONDS', help="stats interval (0 disables)")
+    args = parser.parse_args(argv)
+    
+    server = Server(args.width, args.height, args.capacity, args.tick_rate, args.seed)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.stats))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,82 @@
+from array import array
+from collections import deque
+
+class SnakeBody:
+    def __init__(self, width, height, positions=(), free_cells=None, occupancy=None):
+        self.width = width
+        self.height = height
+        self.free_cells = free_cells
+        self.changes = None
+        self.segments = deque()
+        self.occupancy = occupancy if occupancy is not None else array('H', bytes(2 * width * height))
+        for position in positions:
+            self.push_tail(position)
+    
+    def _cell(self, position):
+        return position[1] * self.width + position[0]
+    
+    def __len__(self):
+        return len(self.segments)
+    
+    def __iter__(self):
+        return iter(self.segments)
+    
+    def __getitem__(self, index):
+        return self.segments[index]
+    
+    def __contains__(self, position):
+        x, y = position
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+        return self.occupancy[y * self.width + x] > 0
+    
+    def count(self, position):
+        if position not in self:
+            return 0
+        return self.occupancy[self._cell(position)]
+    
+    @property
+    def head(self):
+        return self.segments[0]
+    
+    @property
+    def tail(self):
+        return self.segments[-1]
+    
+    def _add(self, position):
+        cell = self._cell(position)
+        self.occupancy[cell] += 1
+        if self.free_cells is not None and self.occupancy[cell] == 1:
+            self.free_cells.occupy(position)
+        if self.changes is not None:
+            self.changes.add(position)
+    
+    def push_head(self, position):
+        self.segments.appendleft(position)
+        self._add(position)
+    
+    def push_tail(self, position):
+        self.segments.append(position)
+        self._add(position)
+    
+    def pop_tail(self):
+        position = self.segments.pop()
+        cell = self._cell(position)
+        self.occupancy[cell] -= 1
+        if self.free_cells is not None and self.occupancy[cell] == 0:
+            self.free_cells.release(position)
+        if self.changes is not None:
+            self.changes.add(position)
+        return position
+    
+    def truncate(self, length):
+        while len(self.segments) > length:
+            self.pop_tail()
+    
+    def track_changes(self):
+        self.changes = set()
+    
+    def drain_changes(self):
+        changes = self.changes
+        self.changes = set()
+        return changes
\ No newline at end of file
@@ -0,0 +1,205 @@
+import numpy as np
+
+GRID_WIDTH = 40
+GRID_HEIGHT = 30
+
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+NO_ACTION = -1
+
+DIRECTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int32)
+OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+
+FOOD_POINTS = 10
+SAMPLE_ATTEMPTS = 8
+TURN_CHANCE = 0.2
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+MIX_A = np.uint64(0xBF58476D1CE4E5B9)
+MIX_B = np.uint64(0x94D049BB133111EB)
+
+class SnakeEngine:
+    def __init__(self, num_games, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        if seed is None or np.isscalar(seed):
+            seed = np.random.SeedSequence(seed).generate_state(num_games, np.uint64)
+        self.seeds = np.array(seed, dtype=np.uint64)
+        if len(self.seeds) != num_games:
+            raise ValueError(f"expected {num_games} seeds, got {len(self.seeds)}")
+        self.rngs = [np.random.default_rng(int(game_seed)) for game_seed in self.seeds]
+        
+        self.occupied = np.zeros((num_games, self.num_cells), dtype=bool)
+        self.body = np.zeros((num_games, self.num_cells), dtype=np.int32)
+        self.head_index = np.zeros(num_games, dtype=np.int64)
+        self.length = np.zeros(num_games, dtype=np.int64)
+        self.direction = np.zeros(num_games, dtype=np.int8)
+        self.food = np.zeros(num_games, dtype=np.int64)
+        self.grow = np.zeros(num_games, dtype=bool)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.ticks = np.zeros(num_games, dtype=np.int64)
+        self.alive = np.zeros(num_games, dtype=bool)
+        self.won = np.zeros(num_games, dtype=bool)
+        self._games = np.arange(num_games)
+        
+        self.reset()
+    
+    def reset(self, games=None):
+        if games is None:
+            games = self._games
+        else:
+            games = np.asarray(games)
+            if games.dtype == bool:
+                games = np.flatnonzero(games)
+        if len(games) == 0:
+            return
+        
+        start = (self.height // 2) * self.width + self.width // 2
+        self.occupied[games] = False
+        self.occupied[games, start] = True
+        self.body[games, 0] = start
+        self.head_index[games] = 0
+        self.length[games] = 1
+        self.direction[games] = RIGHT
+        self.grow[games] = False
+        self.score[games] = 0
+        self.ticks[games] = 0
+        self.alive[games] = True
+        self.won[games] = False
+        
+        for game in games:
+            self._place_food(game)
+    
+    def _place_food(self, game):
+        occupied = self.occupied[game]
+        for _ in range(SAMPLE_ATTEMPTS):
+            cell = self.rngs[game].integers(self.num_cells)
+            if not occupied[cell]:
+                self.food[game] = cell
+                return True
+        
+        empty = np.flatnonzero(~occupied)
+        if len(empty) == 0:
+            return False
+        self.food[game] = empty[self.rngs[game].integers(len(empty))]
+        return True
+    
+    def step(self, actions=None):
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turning = (actions != NO_ACTION) & (OPPOSITE[actions.clip(0)] != self.direction)
+            self.direction[turning] = actions[turning]
+        
+        games = np.flatnonzero(self.alive)
+        ate = np.zeros(self.num_games, dtype=bool)
+        died = np.zeros(self.num_games, dtype=bool)
+        if len(games) == 0:
+            return ate, died
+        
+        head = self.body[games, self.head_index[games]]
+        delta = DIRECTIONS[self.direction[games]]
+        x = head % self.width + delta[:, 0]
+        y = head // self.width + delta[:, 1]
+        
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        cell = np.where(inside, y * self.width + x, 0)
+        crashed = ~inside | self.occupied[games, cell]
+        
+        dead = games[crashed]
+        self.alive[dead] = False
+        died[dead] = True
+        
+        moving = ~crashed
+        games = games[moving]
+        cell = cell[moving]
+        
+        head_index = (self.head_index[games] + 1) % self.num_cells
+        self.head_index[games] = head_index
+        self.body[games, head_index] = cell
+        self.occupied[games, cell] = True
+        
+        growing = self.grow[games]
+        shrinking = games[~growing]
+        tail = self.body[shrinking, (head_index[~growing] - self.length[shrinking]) % self.num_cells]
+        self.occupied[shrinking, tail] = False
+        self.length[games[growing]] += 1
+        self.grow[games] = False
+        self.ticks[games] += 1
+        
+        eating = games[cell == self.food[games]]
+        ate[eating] = True
+        self.grow[eating] = True
+        self.score[eating] += FOOD_POINTS
+        for game in eating:
+            if not self._place_food(game):
+                self.alive[game] = False
+                self.won[game] = True
+                died[game] = True
+        
+        return ate, died
+    
+    def random(self, games, count=1):
+        x = self.seeds[games, None] * GOLDEN + self.ticks[games, None].astype(np.uint64) * np.uint64(count)
+        x = x + np.arange(count, dtype=np.uint64)
+        x ^= x >> np.uint64(30)
+        x *= MIX_A
+        x ^= x >> np.uint64(27)
+        x *= MIX_B
+        x ^= x >> np.uint64(31)
+        return (x >> np.uint64(11)) * (1.0 / (1 << 53))
+    
+    def head(self, game):
+        cell = self.body[game, self.head_index[game]]
+        return (int(cell % self.width), int(cell // self.width))
+    
+    def positions(self, game):
+        indices = (self.head_index[game] - np.arange(self.length[game])) % self.num_cells
+        cells = self.body[game, indices]
+        return [(int(cell % self.width), int(cell // self.width)) for cell in cells]
+    
+    def food_position(self, game):
+        cell = self.food[game]
+        return (int(cell % self.width), int(cell // self.width))
+
+def next_cells(engine, games):
+    head = engine.body[games, engine.head_index[games]]
+    x = (head % engine.width)[:, None] + DIRECTIONS[:, 0]
+    y = (head // engine.width)[:, None] + DIRECTIONS[:, 1]
+    inside = (x >= 0) & (x < engine.width) & (y >= 0) & (y < engine.height)
+    cell = np.where(inside, y * engine.width + x, 0)
+    safe = inside & ~engine.occupied[games[:, None], cell]
+    safe[np.arange(len(games)), OPPOSITE[engine.direction[games]]] = False
+    return x, y, safe
+
+def greedy_actions(engine):
+    actions = np.full(engine.num_games, NO_ACTION, dtype=np.int8)
+    games = np.flatnonzero(engine.alive)
+    x, y, safe = next_cells(engine, games)
+    food = engine.food[games]
+    distance = np.abs(x - (food % engine.width)[:, None]) + np.abs(y - (food // engine.width)[:, None])
+    key = distance * 2 + (np.arange(4) != engine.direction[games][:, None])
+    key[~safe] = np.iinfo(key.dtype).max
+    chosen = key.argmin(axis=1)
+    moving = safe.any(axis=1)
+    actions[games[moving]] = chosen[moving]
+    return actions
+
+def random_actions(engine, turn_chance=TURN_CHANCE):
+    actions = np.full(engine.num_games, NO_ACTION, dtype=np.int8)
+    games = np.flatnonzero(engine.alive)
+    _, _, safe = next_cells(engine, games)
+    current = engine.direction[games]
+    draws = engine.random(games, 5)
+    keep = safe[np.arange(len(games)), current] & (draws[:, 0] > turn_chance)
+    chosen = np.where(keep, current, (draws[:, 1:] * safe).argmax(axis=1))
+    moving = safe.any(axis=1)
+    actions[games[moving]] = chosen[moving]
+    return actions
+
+ENGINE_POLICIES = {
+    'random': random_actions,
+    'greedy': greedy_actions,
+}
\ No newline at end of file
@@ -1,16 +1,40 @@
 import pygame
 import random
 import sys
+import argparse
 import math
 import time
-
-pygame.init()
+from itertools import islice
+from snake_body import SnakeBody
+from free_cells import FreeCellIndex
+from particles import ParticleSystem
+from render_cache import RenderCache
+from dirty_rects import DirtyRectTracker
+from timestep import FixedTimestep, interpolate_cell
+from input_buffer import InputBuffer
+from replay import Replay, write_replays
+from profiler import FrameProfiler
+from autopilot import Autopilot
+from entities import FOOD, WALL, EntityStore
+from scheduler import TickScheduler
+from subsystems import init_display
+from telemetry import FORMATS, TelemetryWriter
 
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 GRID_SIZE = 20
 GRID_WIDTH = WINDOW_WIDTH // GRID_SIZE
 GRID_HEIGHT = WINDOW_HEIGHT // GRID_SIZE
+TICK_RATE = 10
+RENDER_FPS = 60
+
+KEY_DIRECTIONS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+}
+AUTOPILOT_KEY = pygame.K_TAB
 
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -22,44 +46,70 @@ GOLD = (255, 215, 0)
 PURPLE = (128, 0, 128)
 CYAN = (0, 255, 255)
 ORANGE = (255, 165, 0)
+GRAY = (110, 110, 110)
+DARK_GRAY = (60, 60, 60)
 
-class Particle:
-    def __init__(self, x, y, color, velocity_x=None, velocity_y=None):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity_x = velocity_x if velocity_x else random.uniform(-3, 3)
-        self.velocity_y = velocity_y if velocity_y else random.uniform(-3, 3)
-        self.life = 30
-        self.max_life = 30
-        self.size = random.uniform(2, 5)
-    
-    def update(self):
-        self.x += self.velocity_x
-        self.y += self.velocity_y
-        self.velocity_y += 0.1
-        self.life -= 1
-        return self.life > 0
-    
-    def draw(self, screen):
-        alpha = int(255 * (self.life / self.max_life))
-        color_with_alpha = (*self.color, alpha)
-        surf = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(surf, color_with_alpha, (self.size, self.size), self.size)
-        screen.blit(surf, (self.x - self.size, self.y - self.size))
+FOOD_PULSE = 5
+FOOD_PULSE_RATE = 2
+GLOW_STEPS = 16
+TRAIL_LENGTH = 10
+TRAIL_SIZE = 6
+
+POWER_UP_LIFETIME = 15 * TICK_RATE
+POWER_UP_SPAWN_TICKS = (10 * TICK_RATE, 20 * TICK_RATE)
+GHOST_TICKS = 5 * TICK_RATE
+DOUBLE_POINTS_TICKS = 10 * TICK_RATE
+
+POWER_UP_TYPES = ('speed', 'slow', 'ghost', 'double_points', 'shrink')
+
+POWER_UP_SYMBOLS = {
+    'speed': '>>',
+    'slow': '<<',
+    'ghost': '👻',
+    'double_points': 'x2',
+    'shrink': '--'
+}
+
+def render_segment(head, ghost):
+    if head:
+        sprite = pygame.Surface((GRID_SIZE + 4, GRID_SIZE + 4))
+        sprite.fill(PURPLE if ghost else BRIGHT_GREEN)
+        pygame.draw.rect(sprite, BLACK, (2, 2, GRID_SIZE, GRID_SIZE), 1)
+    elif ghost:
+        sprite = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+        sprite.fill((*PURPLE, 100))
+        pygame.draw.rect(sprite, BLACK, sprite.get_rect(), 1)
+    else:
+        sprite = pygame.Surface((GRID_SIZE, GRID_SIZE))
+        sprite.fill(GREEN)
+        pygame.draw.rect(sprite, BLACK, sprite.get_rect(), 1)
+    return sprite
+
+def render_trail(length):
+    sprites = []
+    for i in range(length):
+        sprite = pygame.Surface((TRAIL_SIZE, TRAIL_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (0, 255, 0, int(50 * (i / length))), (TRAIL_SIZE // 2, TRAIL_SIZE // 2), TRAIL_SIZE // 2)
+        sprites.append(sprite)
+    return sprites
 
 class PowerUp:
-    def __init__(self):
+    def __init__(self, free_cells=None, rng=random, tick=0):
+        self.free_cells = free_cells
+        self.rng = rng
         self.position = self.generate_position()
-        self.type = random.choice(['speed', 'slow', 'ghost', 'double_points', 'shrink'])
-        self.spawn_time = time.time()
-        self.duration = 15
+        self.type = self.rng.choice(POWER_UP_TYPES)
+        self.spawn_tick = tick
+        self.duration = POWER_UP_LIFETIME
+        self.expiry = None
         
     def generate_position(self):
-        return (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+        if self.free_cells is not None:
+            return self.free_cells.take(self.rng)
+        return (self.rng.randint(0, GRID_WIDTH - 1), self.rng.randint(0, GRID_HEIGHT - 1))
     
-    def is_expired(self):
-        return time.time() - self.spawn_time > self.duration
+    def expiry_tick(self):
+        return self.spawn_tick + self.duration + 1
     
     def get_color(self):
         colors = {
@@ -71,49 +121,51 @@ class PowerUp:
         }
         return colors.get(self.type, WHITE)
     
-    def draw(self, screen):
-        rect = pygame.Rect(self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+    def render_sprite(self, glow_step, cache):
         color = self.get_color()
-        
-        glow_intensity = abs(math.sin(time.time() * 5)) * 100 + 155
+        glow_intensity = glow_step * 100 / (GLOW_STEPS - 1) + 155
         glow_color = tuple(min(255, int(c * glow_intensity / 255)) for c in color)
         
-        pygame.draw.ellipse(screen, glow_color, rect)
+        sprite = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+        rect = sprite.get_rect()
+        pygame.draw.ellipse(sprite, glow_color, rect)
+        pygame.draw.ellipse(sprite, color, rect.inflate(-6, -6))
         
-        inner_rect = pygame.Rect(rect.x + 3, rect.y + 3, rect.width - 6, rect.height - 6)
-        pygame.draw.ellipse(screen, color, inner_rect)
+        text = cache.text(POWER_UP_SYMBOLS.get(self.type, '?'), 16, WHITE)
+        sprite.blit(text, text.get_rect(center=rect.center))
+        return sprite
         
-        font = pygame.font.Font(None, 16)
-        symbols = {
-            'speed': '>>',
-            'slow': '<<',
-            'ghost': '👻',
-            'double_points': 'x2',
-            'shrink': '--'
-        }
-        text = font.render(symbols.get(self.type, '?'), True, WHITE)
-        text_rect = text.get_rect(center=rect.center)
-        screen.blit(text, text_rect)
+    def draw(self, screen, cache):
+        glow_step = int(abs(math.sin(time.time() * 5)) * (GLOW_STEPS - 1) + 0.5)
+        sprite = cache.sprite(('power_up', self.type, glow_step), self.render_sprite, glow_step, cache)
+        screen.blit(sprite, (self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE))
+
+    def get_rect(self):
+        return pygame.Rect(self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
 
 class Snake:
-    def __init__(self):
-        self.positions = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
+    def __init__(self, free_cells=None):
+        self.positions = SnakeBody(GRID_WIDTH, GRID_HEIGHT, [(GRID_WIDTH // 2, GRID_HEIGHT // 2)], free_cells)
         self.direction = (1, 0)
         self.grow = False
         self.speed_multiplier = 1.0
         self.ghost_mode = False
-        self.ghost_end_time = 0
+        self.ghost_end_tick = 0
         self.double_points = False
-        self.double_points_end_time = 0
+        self.double_points_end_tick = 0
         self.trail_positions = []
+        self.last_tail = None
+        self.timers = TickScheduler()
+        self.ghost_timer = None
+        self.double_points_timer = None
         
     def move(self):
         head = self.positions[0]
         new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
         
-        self.trail_positions.append((head[0] * GRID_SIZE + GRID_SIZE // 2, 
+        self.trail_positions.append((head[0] * GRID_SIZE + GRID_SIZE // 2,
                                    head[1] * GRID_SIZE + GRID_SIZE // 2))
-        if len(self.trail_positions) > 10:
+        if len(self.trail_positions) > TRAIL_LENGTH:
             self.trail_positions.pop(0)
         
         if not self.ghost_mode:
@@ -124,24 +176,32 @@ class Snake:
         else:
             new_head = (new_head[0] % GRID_WIDTH, new_head[1] % GRID_HEIGHT)
         
-        self.positions.insert(0, new_head)
+        self.positions.push_head(new_head)
         
         if not self.grow:
-            self.positions.pop()
+            self.last_tail = self.positions.pop_tail()
         else:
             self.grow = False
+            self.last_tail = None
         
-        self.update_power_ups()
         return True
     
-    def update_power_ups(self):
-        current_time = time.time()
-        
-        if self.ghost_mode and current_time > self.ghost_end_time:
-            self.ghost_mode = False
-        
-        if self.double_points and current_time > self.double_points_end_time:
-            self.double_points = False
+    def end_ghost(self):
+        self.ghost_mode = False
+        self.ghost_timer = None
+    
+    def end_double_points(self):
+        self.double_points = False
+        self.double_points_timer = None
+    
+    def reschedule(self, timers):
+        self.timers = timers
+        self.ghost_timer = None
+        self.double_points_timer = None
+        if self.ghost_mode:
+            self.ghost_timer = timers.schedule(self.ghost_end_tick + 1, self.end_ghost)
+        if self.double_points:
+            self.double_points_timer = timers.schedule(self.double_points_end_tick, self.end_double_points)
     
     def change_direction(self, direction):
         if (direction[0] * -1, direction[1] * -1) != self.direction:
@@ -153,192 +213,448 @@ class Snake:
     def shrink(self):
         if len(self.positions) > 3:
             half_length = len(self.positions) // 2
-            self.positions = self.positions[:half_length]
+            self.positions.truncate(half_length)
     
-    def apply_power_up(self, power_type):
-        current_time = time.time()
-        
+    def apply_power_up(self, power_type, tick):
         if power_type == 'speed':
             self.speed_multiplier = 2.0
         elif power_type == 'slow':
             self.speed_multiplier = 0.5
         elif power_type == 'ghost':
             self.ghost_mode = True
-            self.ghost_end_time = current_time + 5
+            self.ghost_end_tick = tick + GHOST_TICKS
+            self.timers.cancel(self.ghost_timer)
+            self.ghost_timer = self.timers.schedule(self.ghost_end_tick + 1, self.end_ghost)
         elif power_type == 'double_points':
             self.double_points = True
-            self.double_points_end_time = current_time + 10
+            self.double_points_end_tick = tick + DOUBLE_POINTS_TICKS
+            self.timers.cancel(self.double_points_timer)
+            self.double_points_timer = self.timers.schedule(self.double_points_end_tick, self.end_double_points)
         elif power_type == 'shrink':
             self.shrink()
     
-    def draw(self, screen):
-        for i, position in enumerate(self.positions):
-            rect = pygame.Rect(position[0] * GRID_SIZE, position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            
-            if i == 0:
-                color = BRIGHT_GREEN if not self.ghost_mode else (PURPLE[0], PURPLE[1], PURPLE[2], 128)
-                glow_rect = pygame.Rect(rect.x - 2, rect.y - 2, rect.width + 4, rect.height + 4)
-                pygame.draw.rect(screen, color, glow_rect)
-            else:
-                alpha = 255 - (i * 10) if not self.ghost_mode else 100
-                alpha = max(50, alpha)
-                color = (*GREEN, alpha) if not self.ghost_mode else (*PURPLE, alpha)
-            
-            if self.ghost_mode:
-                surf = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(surf, (*color[:3], 100), (0, 0, GRID_SIZE, GRID_SIZE))
-                screen.blit(surf, rect.topleft)
-            else:
-                pygame.draw.rect(screen, color[:3], rect)
-            
-            pygame.draw.rect(screen, BLACK, rect, 1)
+    def interpolated(self, alpha):
+        head = self.positions[0]
+        previous = self.positions[1] if len(self.positions) > 1 else self.last_tail
+        head_pixel = interpolate_cell(previous or head, head, alpha, GRID_SIZE)
+        tail_pixel = None
+        if self.last_tail is not None:
+            tail_pixel = interpolate_cell(self.last_tail, self.positions[-1], alpha, GRID_SIZE)
+        return head_pixel, tail_pixel
+    
+    def head_rect(self, alpha=1.0):
+        head_pixel = self.interpolated(alpha)[0]
+        return pygame.Rect(head_pixel[0] - 2, head_pixel[1] - 2, GRID_SIZE + 4, GRID_SIZE + 4)
+    
+    def tail_rect(self, alpha=1.0):
+        tail_pixel = self.interpolated(alpha)[1]
+        if tail_pixel is None:
+            return None
+        return pygame.Rect(tail_pixel, (GRID_SIZE, GRID_SIZE))
+    
+    def trail_rect(self):
+        if not self.trail_positions:
+            return None
+        half = TRAIL_SIZE // 2
+        rects = [pygame.Rect(pos[0] - half, pos[1] - half, TRAIL_SIZE, TRAIL_SIZE) for pos in self.trail_positions]
+        return rects[0].unionall(rects[1:])
+    
+    def segment_sprites(self, cache):
+        head_sprite = cache.sprite(('segment', True, self.ghost_mode), render_segment, True, self.ghost_mode)
+        body_sprite = cache.sprite(('segment', False, self.ghost_mode), render_segment, False, self.ghost_mode)
+        return head_sprite, body_sprite
+    
+    def draw(self, screen, cache, alpha=1.0):
+        head_sprite, body_sprite = self.segment_sprites(cache)
         
-        for i, pos in enumerate(self.trail_positions):
-            alpha = int(50 * (i / len(self.trail_positions)))
-            trail_surf = pygame.Surface((6, 6), pygame.SRCALPHA)
-            pygame.draw.circle(trail_surf, (0, 255, 0, alpha), (3, 3), 3)
-            screen.blit(trail_surf, (pos[0] - 3, pos[1] - 3))
+        blits = [(head_sprite, self.head_rect(alpha))]
+        blits += [(body_sprite, (x * GRID_SIZE, y * GRID_SIZE)) for x, y in islice(self.positions, 1, None)]
+        
+        tail_rect = self.tail_rect(alpha)
+        if tail_rect is not None:
+            blits.append((body_sprite, tail_rect))
+        
+        self.trail_blits(cache, blits)
+        screen.blits(blits, False)
+    
+    def draw_area(self, screen, cache, area, cells, alpha=1.0):
+        head_sprite, body_sprite = self.segment_sprites(cache)
+        
+        blits = []
+        head = self.positions[0]
+        head_rect = self.head_rect(alpha)
+        if head_rect.colliderect(area):
+            blits.append((head_sprite, head_rect))
+        
+        for position in cells:
+            count = self.positions.count(position)
+            if position == head:
+                count -= 1
+            blits += [(body_sprite, (position[0] * GRID_SIZE, position[1] * GRID_SIZE))] * count
+        
+        tail_rect = self.tail_rect(alpha)
+        if tail_rect is not None and tail_rect.colliderect(area):
+            blits.append((body_sprite, tail_rect))
+        
+        self.trail_blits(cache, blits, area)
+        screen.blits(blits, False)
+    
+    def trail_blits(self, cache, blits, area=None):
+        length = len(self.trail_positions)
+        if length < 2:
+            return blits
+        sprites = cache.sprite(('trail', length), render_trail, length)
+        half = TRAIL_SIZE // 2
+        for sprite, pos in islice(zip(sprites, self.trail_positions), 1, None):
+            rect = (pos[0] - half, pos[1] - half, TRAIL_SIZE, TRAIL_SIZE)
+            if area is None or area.colliderect(rect):
+                blits.append((sprite, rect))
+        return blits
 
 class Food:
-    def __init__(self):
+    def __init__(self, free_cells=None, rng=random):
+        self.free_cells = free_cells
+        self.rng = rng
         self.position = self.generate_position()
-        self.pulse_time = 0
         
     def generate_position(self):
-        return (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+        if self.free_cells is not None:
+            return self.free_cells.take(self.rng)
+        return (self.rng.randint(0, GRID_WIDTH - 1), self.rng.randint(0, GRID_HEIGHT - 1))
     
-    def draw(self, screen):
-        self.pulse_time += 0.2
-        pulse = abs(math.sin(self.pulse_time)) * 5
+    def render_sprite(self, pulse):
+        size = GRID_SIZE + FOOD_PULSE * 2
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
         
-        rect = pygame.Rect(self.position[0] * GRID_SIZE - pulse, 
-                          self.position[1] * GRID_SIZE - pulse, 
-                          GRID_SIZE + pulse * 2, GRID_SIZE + pulse * 2)
+        rect = pygame.Rect(FOOD_PULSE - pulse, FOOD_PULSE - pulse, GRID_SIZE + pulse * 2, GRID_SIZE + pulse * 2)
+        pygame.draw.ellipse(sprite, RED, rect)
         
-        pygame.draw.ellipse(screen, RED, rect)
+        inner_rect = pygame.Rect(FOOD_PULSE + 3, FOOD_PULSE + 3, GRID_SIZE - 6, GRID_SIZE - 6)
+        pygame.draw.ellipse(sprite, (255, 100, 100), inner_rect)
+        return sprite
+    
+    def next_sprite(self, cache):
+        pulse = int(abs(math.sin(time.time() * FOOD_PULSE_RATE)) * FOOD_PULSE)
+        return cache.sprite(('food', pulse), self.render_sprite, pulse)
         
-        inner_rect = pygame.Rect(self.position[0] * GRID_SIZE + 3, 
-                                self.position[1] * GRID_SIZE + 3, 
-                                GRID_SIZE - 6, GRID_SIZE - 6)
-        pygame.draw.ellipse(screen, (255, 100, 100), inner_rect)
+    def get_rect(self):
+        size = GRID_SIZE + FOOD_PULSE * 2
+        return pygame.Rect(self.position[0] * GRID_SIZE - FOOD_PULSE, self.position[1] * GRID_SIZE - FOOD_PULSE, size, size)
+    
+    def draw(self, screen, cache):
+        screen.blit(self.next_sprite(cache), self.get_rect())
+
+class Wall:
+    def __init__(self, position):
+        self.position = position
+    
+    def render_sprite(self):
+        sprite = pygame.Surface((GRID_SIZE, GRID_SIZE))
+        sprite.fill(GRAY)
+        pygame.draw.rect(sprite, DARK_GRAY, sprite.get_rect(), 2)
+        return sprite
+    
+    def draw(self, screen, cache):
+        screen.blit(cache.sprite(('wall',), self.render_sprite), self.get_rect())
+    
+    def get_rect(self):
+        return pygame.Rect(self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Snake Enhanced - Power-Up Edition!")
+    VARIANT = 'snake_enhanced'
+    
+    def __init__(self, dirty_rendering=False, seed=None, headless=False, replay_path=None, profile=False, autopilot=False, telemetry=None, render_fps=RENDER_FPS):
+        self.headless = headless
+        self.screen = None
+        if not headless:
+            init_display()
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            pygame.display.set_caption("Snake Enhanced - Power-Up Edition!")
         self.clock = pygame.time.Clock()
-        self.snake = Snake()
-        self.food = Food()
-        self.power_ups = []
-        self.particles = []
+        self.render_cache = RenderCache()
+        self.particles = ParticleSystem()
+        self.dirty_rects = None
+        if dirty_rendering:
+            self.dirty_rects = DirtyRectTracker((WINDOW_WIDTH, WINDOW_HEIGHT), GRID_SIZE)
+        self.input_buffer = InputBuffer()
+        self.profiler = FrameProfiler(profile, inputs=self.input_buffer)
+        self.replay_path = replay_path
+        self.autopilot_enabled = autopilot
+        self.telemetry = telemetry
+        self.render_fps = render_fps
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.replay = None
+        if self.replay_path is not None:
+            self.replay = Replay(self.VARIANT, self.seed, GRID_WIDTH, GRID_HEIGHT, TICK_RATE)
+        if self.telemetry is not None:
+            self.game_id = self.telemetry.start_game(self.VARIANT)
+        self.free_cells = FreeCellIndex(GRID_WIDTH, GRID_HEIGHT)
+        self.snake = Snake(self.free_cells)
+        self.food = Food(self.free_cells, self.rng)
+        self.entities = EntityStore(GRID_WIDTH, GRID_HEIGHT, self.free_cells)
+        self.entities.add(self.food, FOOD)
+        self.power_ups_used = {}
+        self.particles.clear()
         self.score = 0
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.last_power_up_spawn = time.time()
-        
+        self.next_power_up_tick = self.rng.randint(*POWER_UP_SPAWN_TICKS)
+        self.reschedule()
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.input_buffer.clear()
+        self.autopilot = Autopilot(self) if self.autopilot_enabled else None
+        if self.dirty_rects is not None:
+            self.snake.positions.track_changes()
+            self.dirty_rects.invalidate()
+        
+    def reschedule(self):
+        self.scheduler = TickScheduler()
+        for power_up in self.power_ups():
+            power_up.expiry = self.scheduler.schedule(power_up.expiry_tick(), self.expire_power_up, power_up)
+        self.spawn_event = self.scheduler.schedule(self.next_power_up_tick, self.spawn_power_up)
+        self.snake.reschedule(self.scheduler)
+    
+    def power_ups(self):
+        return [entity for entity in self.entities if entity.kind in POWER_UP_TYPES]
+    
     def spawn_power_up(self):
-        if time.time() - self.last_power_up_spawn > random.uniform(10, 20):
-            power_up = PowerUp()
-            while power_up.position in self.snake.positions or power_up.position == self.food.position:
-                power_up.position = power_up.generate_position()
-            self.power_ups.append(power_up)
-            self.last_power_up_spawn = time.time()
+        power_up = PowerUp(self.free_cells, self.rng, self.tick)
+        if self.entities.add(power_up, power_up.type) is not None:
+            power_up.expiry = self.scheduler.schedule(power_up.expiry_tick(), self.expire_power_up, power_up)
+        self.next_power_up_tick = self.tick + self.rng.randint(*POWER_UP_SPAWN_TICKS)
+        self.scheduler.cancel(self.spawn_event)
+        self.spawn_event = self.scheduler.schedule(self.next_power_up_tick, self.spawn_power_up)
+    
+    def expire_power_up(self, power_up):
+        if self.entities.at(power_up.position) is power_up:
+            self.entities.remove(power_up, release=True)
     
     def create_explosion(self, x, y, color, count=15):
-        for _ in range(count):
-            particle = Particle(x, y, color)
-            self.particles.append(particle)
+        if self.headless:
+            return
+        self.particles.emit(x, y, color, count)
     
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    self.snake.change_direction((0, -1))
-                elif event.key == pygame.K_DOWN:
-                    self.snake.change_direction((0, 1))
-                elif event.key == pygame.K_LEFT:
-                    self.snake.change_direction((-1, 0))
-                elif event.key == pygame.K_RIGHT:
-                    self.snake.change_direction((1, 0))
+            elif event.type == pygame.KEYDOWN and event.key in KEY_DIRECTIONS:
+                self.input_buffer.push(KEY_DIRECTIONS[event.key], pygame.time.get_ticks(), self.snake.direction)
+            elif event.type == pygame.KEYDOWN and event.key == AUTOPILOT_KEY:
+                self.toggle_autopilot()
+            elif self.profiler.handle_event(event) and self.dirty_rects is not None:
+                self.dirty_rects.invalidate()
         return True
     
+    def apply_input(self):
+        direction = self.input_buffer.pop(pygame.time.get_ticks())
+        if self.autopilot is not None:
+            direction = self.autopilot(self)
+        if direction is not None:
+            self.snake.change_direction(direction)
+    
+    def toggle_autopilot(self):
+        self.autopilot_enabled = not self.autopilot_enabled
+        self.autopilot = Autopilot(self) if self.autopilot_enabled else None
+    
+    def save_replay(self):
+        if self.replay is None:
+            return
+        self.replay.finish(self.tick, self.score)
+        write_replays(self.replay_path, [self.replay])
+        self.replay = None
+    
+    def emit(self, event, detail=''):
+        if self.telemetry is not None:
+            self.telemetry.emit(self.game_id, self.tick, event, detail, self.score, len(self.snake.positions))
+    
+    def die(self, cause):
+        self.emit('death', cause)
+        if self.telemetry is not None:
+            self.telemetry.flush()
+        return False
+    
+    def collision_cause(self):
+        head = self.snake.positions[0]
+        x, y = head[0] + self.snake.direction[0], head[1] + self.snake.direction[1]
+        return 'wall' if not (0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT) else 'self'
+    
     def update(self):
-        if not self.snake.move():
-            return False
-        
-        if self.snake.positions[0] == self.food.position:
-            self.snake.grow_snake()
-            
-            points = 10
-            if self.snake.double_points:
-                points *= 2
-            self.score += points
-            
-            food_x = self.food.position[0] * GRID_SIZE + GRID_SIZE // 2
-            food_y = self.food.position[1] * GRID_SIZE + GRID_SIZE // 2
-            self.create_explosion(food_x, food_y, RED, 20)
-            
-            while self.food.position in self.snake.positions:
-                self.food.position = self.food.generate_position()
-        
-        for power_up in self.power_ups[:]:
-            if self.snake.positions[0] == power_up.position:
-                self.snake.apply_power_up(power_up.type)
-                
-                power_x = power_up.position[0] * GRID_SIZE + GRID_SIZE // 2
-                power_y = power_up.position[1] * GRID_SIZE + GRID_SIZE // 2
-                self.create_explosion(power_x, power_y, power_up.get_color(), 25)
-                
-                self.power_ups.remove(power_up)
-            elif power_up.is_expired():
-                self.power_ups.remove(power_up)
-        
-        self.spawn_power_up()
-        
-        self.particles = [p for p in self.particles if p.update()]
-        
+        self.apply_input()
+        if self.replay is not None:
+            self.replay.record(self.tick, self.snake.direction)
+        self.tick += 1
+        with self.profiler.section('update.move'):
+            moved = self.snake.move()
+        if not moved:
+            return self.die(self.collision_cause())
+        
+        with self.profiler.section('update.pickup'):
+            entity = self.entities.at(self.snake.positions[0])
+            if entity is not None:
+                if entity.kind == WALL:
+                    return self.die('wall')
+                self.entities.remove(entity)
+                x = entity.position[0] * GRID_SIZE + GRID_SIZE // 2
+                y = entity.position[1] * GRID_SIZE + GRID_SIZE // 2
+                if entity is self.food:
+                    self.snake.grow_snake()
+                    self.score += 20 if self.snake.double_points else 10
+                    self.emit('pickup', 'food')
+                    self.create_explosion(x, y, RED, 20)
+                    
+                    self.food.position = self.food.generate_position()
+                    if self.food.position is None:
+                        return self.die('board_full')
+                    self.entities.add(self.food, FOOD)
+                else:
+                    self.scheduler.cancel(entity.expiry)
+                    self.snake.apply_power_up(entity.type, self.tick)
+                    self.power_ups_used[entity.type] = self.power_ups_used.get(entity.type, 0) + 1
+                    self.emit('pickup', entity.type)
+                    self.create_explosion(x, y, entity.get_color(), 25)
+        
+        with self.profiler.section('update.power_ups'):
+            self.scheduler.run_due(self.tick)
+        
+        with self.profiler.section('update.particles'):
+            self.particles.update()
+        
+        if self.telemetry is not None:
+            self.emit('tick')
         return True
     
-    def draw(self):
-        self.screen.fill(BLACK)
-        
-        for particle in self.particles:
-            particle.draw(self.screen)
-        
-        self.snake.draw(self.screen)
-        self.food.draw(self.screen)
-        
-        for power_up in self.power_ups:
-            power_up.draw(self.screen)
-        
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+    def hud_labels(self):
+        score_text = self.render_cache.text(f"Score: {self.score}", 36, WHITE)
+        labels = [(score_text, (10, 10))]
         
         y_offset = 50
         if self.snake.ghost_mode:
-            ghost_text = self.small_font.render("👻 GHOST MODE", True, PURPLE)
-            self.screen.blit(ghost_text, (10, y_offset))
+            ghost_text = self.render_cache.text("👻 GHOST MODE", 24, PURPLE)
+            labels.append((ghost_text, (10, y_offset)))
             y_offset += 25
         
         if self.snake.double_points:
-            double_text = self.small_font.render("⚡ DOUBLE POINTS", True, (255, 0, 255))
-            self.screen.blit(double_text, (10, y_offset))
+            double_text = self.render_cache.text("⚡ DOUBLE POINTS", 24, (255, 0, 255))
+            labels.append((double_text, (10, y_offset)))
             y_offset += 25
         
         if self.snake.speed_multiplier != 1.0:
             speed_text = "🚀 SPEED BOOST" if self.snake.speed_multiplier > 1 else "🐌 SLOW MOTION"
             color = GOLD if self.snake.speed_multiplier > 1 else CYAN
-            speed_display = self.small_font.render(speed_text, True, color)
-            self.screen.blit(speed_display, (10, y_offset))
+            speed_display = self.render_cache.text(speed_text, 24, color)
+            labels.append((speed_display, (10, y_offset)))
         
-        pygame.display.flip()
+        return labels
+    
+    def effect_rects(self, alpha):
+        rects = [self.snake.head_rect(alpha), self.food.get_rect()]
+        rects.extend(power_up.get_rect() for power_up in self.power_ups())
+        rects.extend(surface.get_rect(topleft=position) for surface, position in self.hud_labels())
+        for rect in (self.snake.tail_rect(alpha), self.snake.trail_rect(), self.particles.bounds(alpha)):
+            if rect is not None:
+                rects.append(rect)
+        return rects
+    
+    def draw(self, alpha=1.0):
+        if self.profiler.overlay and self.dirty_rects is not None:
+            self.dirty_rects.invalidate()
+        if self.dirty_rects is not None and not self.dirty_rects.full:
+            self.draw_dirty(alpha)
+            return
+        
+        with self.profiler.section('draw.clear'):
+            self.screen.fill(BLACK)
+        
+        with self.profiler.section('draw.particles'):
+            self.particles.draw(self.screen, alpha)
+        
+        with self.profiler.section('draw.snake'):
+            self.snake.draw(self.screen, self.render_cache, alpha)
+        with self.profiler.section('draw.food'):
+            self.food.draw(self.screen, self.render_cache)
+        
+        with self.profiler.section('draw.power_ups'):
+            for entity in self.entities:
+                if entity is not self.food:
+                    entity.draw(self.screen, self.render_cache)
+        
+        with self.profiler.section('draw.hud'):
+            for surface, position in self.hud_labels():
+                self.screen.blit(surface, position)
+        if self.profiler.overlay:
+            self.profiler.draw_overlay(self.screen)
+        
+        if self.dirty_rects is None:
+            with self.profiler.section('draw.present'):
+                pygame.display.flip()
+            return
+        
+        self.snake.positions.drain_changes()
+        self.drawn_head = self.snake.positions[0]
+        self.drawn_effects = self.effect_rects(alpha)
+        self.drawn_ghost = self.snake.ghost_mode
+        with self.profiler.section('draw.present'):
+            self.dirty_rects.present()
+        
+    def draw_dirty(self, alpha):
+        tracker = self.dirty_rects
+        if self.snake.ghost_mode != self.drawn_ghost:
+            tracker.invalidate()
+        
+        for position in self.snake.positions.drain_changes():
+            tracker.add_cell(position)
+        
+        if self.snake.positions[0] != self.drawn_head:
+            tracker.add_cell(self.drawn_head)
+            self.drawn_head = self.snake.positions[0]
+        
+        effects = self.effect_rects(alpha)
+        for rect in self.drawn_effects + effects:
+            tracker.add(rect)
+        self.drawn_effects = effects
+        
+        if tracker.full:
+            self.draw(alpha)
+            return
+        
+        particle_bounds = self.particles.bounds(alpha)
+        food_sprite = self.food.next_sprite(self.render_cache)
+        food_rect = self.food.get_rect()
+        labels = self.hud_labels()
+        
+        with self.profiler.section('draw.dirty'):
+            for rect in tracker.rects:
+                self.screen.set_clip(rect)
+                self.screen.fill(BLACK)
+            
+                if particle_bounds is not None and rect.colliderect(particle_bounds):
+                    self.particles.draw(self.screen, alpha)
+            
+                self.snake.draw_area(self.screen, self.render_cache, rect, tracker.cells_in(rect), alpha)
+            
+                if rect.colliderect(food_rect):
+                    self.screen.blit(food_sprite, food_rect)
+                
+                for entity in self.entities:
+                    if entity is not self.food and rect.colliderect(entity.get_rect()):
+                        entity.draw(self.screen, self.render_cache)
+                
+                for surface, position in labels:
+                    if rect.colliderect(surface.get_rect(topleft=position)):
+                        self.screen.blit(surface, position)
+            self.screen.set_clip(None)
+        
+        with self.profiler.section('draw.present'):
+            tracker.present()
     
     def game_over_screen(self):
-        game_over_text = self.font.render("Game Over!", True, WHITE)
-        final_score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
-        restart_text = self.font.render("Press SPACE to restart or ESC to quit", True, WHITE)
+        game_over_text = self.render_cache.text("Game Over!", 36, WHITE)
+        final_score_text = self.render_cache.text(f"Final Score: {self.score}", 36, WHITE)
+        restart_text = self.render_cache.text("Press SPACE to restart or ESC to quit", 36, WHITE)
         
         game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
         final_score_rect = final_score_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
@@ -355,40 +671,61 @@ class Game:
         game_over = False
         
         while running:
+            elapsed = self.clock.tick(self.render_fps) / 1000
             if not game_over:
-                if not self.handle_events():
+                self.profiler.begin_frame()
+                with self.profiler.section('events'):
+                    handled = self.handle_events()
+                if not handled:
+                    self.save_replay()
+                    self.emit('end', 'quit')
                     running = False
                     continue
                 
-                if not self.update():
-                    game_over = True
+                self.timestep.add_time(elapsed)
+                while self.timestep.consume():
+                    with self.profiler.section('update'):
+                        alive = self.update()
+                    if not alive:
+                        self.save_replay()
+                        game_over = True
+                        break
+                    self.timestep.set_tick_rate(TICK_RATE * self.snake.speed_multiplier)
+                if game_over:
                     continue
                 
-                self.draw()
-                base_speed = 10
-                actual_speed = base_speed * self.snake.speed_multiplier
-                self.clock.tick(actual_speed)
+                with self.profiler.section('draw'):
+                    self.draw(self.timestep.alpha)
+                self.profiler.end_frame()
             else:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_SPACE:
-                            self.snake = Snake()
-                            self.food = Food()
-                            self.power_ups = []
-                            self.particles = []
-                            self.score = 0
-                            self.last_power_up_spawn = time.time()
+                            self.reset()
                             game_over = False
                         elif event.key == pygame.K_ESCAPE:
                             running = False
                 
                 self.game_over_screen()
         
+        if self.telemetry is not None:
+            self.telemetry.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Snake Enhanced - Power-Up Edition!")
+    parser.add_argument('--dirty-rects', action='store_true')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--record', metavar='ARCHIVE')
+    parser.add_argument('--profile', action='store_true', help="time every frame phase (F3 overlay, F12 export)")
+    parser.add_argument('--autopilot', action='store_true', help="let the built-in AI steer (Tab toggles)")
+    parser.add_argument('--fps', type=int, default=RENDER_FPS, help="render frame rate, e.g. 60, 120 or 144; game ticks stay at TICK_RATE")
+    parser.add_argument('--telemetry', metavar='PATH', help="stream gameplay events to rotated files PATH-NNNN.*")
+    parser.add_argument('--telemetry-format', choices=sorted(FORMATS), default='jsonl')
+    args = parser.parse_args()
+    telemetry = TelemetryWriter(args.telemetry, args.telemetry_format) if args.telemetry else None
+    game = Game(dirty_rendering=args.dirty_rects, seed=args.seed, replay_path=args.record, profile=args.profile, autopilot=args.autopilot, telemetry=telemetry, render_fps=args.fps)
     game.run()
\ No newline at end of file
@@ -1,14 +1,38 @@
 import pygame
 import random
 import sys
-
-pygame.init()
+import argparse
+from functools import cache
+from itertools import islice
+from snake_body import SnakeBody
+from free_cells import FreeCellIndex, SparseFreeCells
+from chunks import ChunkedOccupancy
+from camera import Camera, ChunkRenderer
+from dirty_rects import DirtyRectTracker
+from timestep import FixedTimestep, interpolate_cell
+from input_buffer import InputBuffer
+from replay import Replay, write_replays
+from profiler import FrameProfiler
+from autopilot import Autopilot
+from render_cache import RenderCache
+from subsystems import init_display
+from telemetry import FORMATS, TelemetryWriter
 
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 GRID_SIZE = 20
 GRID_WIDTH = WINDOW_WIDTH // GRID_SIZE
 GRID_HEIGHT = WINDOW_HEIGHT // GRID_SIZE
+TICK_RATE = 10
+RENDER_FPS = 60
+
+KEY_DIRECTIONS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+}
+AUTOPILOT_KEY = pygame.K_TAB
 
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -16,28 +40,40 @@ GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 
+@cache
+def render_segment():
+    sprite = pygame.Surface((GRID_SIZE, GRID_SIZE))
+    sprite.fill(GREEN)
+    pygame.draw.rect(sprite, BLACK, sprite.get_rect(), 1)
+    return sprite
+
 class Snake:
-    def __init__(self):
-        self.positions = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
+    def __init__(self, free_cells=None, width=None, height=None, occupancy=None):
+        self.width = width or GRID_WIDTH
+        self.height = height or GRID_HEIGHT
+        self.positions = SnakeBody(self.width, self.height, [(self.width // 2, self.height // 2)], free_cells, occupancy)
         self.direction = (1, 0)
         self.grow = False
+        self.last_tail = None
+        self.segment_sprite = render_segment()
     
     def move(self):
         head = self.positions[0]
         new_head = (head[0] + self.direction[0], head[1] + self.direction[1])
         
-        if new_head[0] < 0 or new_head[0] >= GRID_WIDTH or new_head[1] < 0 or new_head[1] >= GRID_HEIGHT:
+        if new_head[0] < 0 or new_head[0] >= self.width or new_head[1] < 0 or new_head[1] >= self.height:
             return False
         
         if new_head in self.positions:
             return False
         
-        self.positions.insert(0, new_head)
+        self.positions.push_head(new_head)
         
         if not self.grow:
-            self.positions.pop()
+            self.last_tail = self.positions.pop_tail()
         else:
             self.grow = False
+            self.last_tail = None
         
         return True
     
@@ -48,74 +84,287 @@ class Snake:
     def grow_snake(self):
         self.grow = True
     
-    def draw(self, screen):
-        for position in self.positions:
-            rect = pygame.Rect(position[0] * GRID_SIZE, position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            pygame.draw.rect(screen, GREEN, rect)
-            pygame.draw.rect(screen, BLACK, rect, 1)
+    def interpolated(self, alpha):
+        head = self.positions[0]
+        previous = self.positions[1] if len(self.positions) > 1 else self.last_tail
+        head_pixel = interpolate_cell(previous or head, head, alpha, GRID_SIZE)
+        tail_pixel = None
+        if self.last_tail is not None:
+            tail_pixel = interpolate_cell(self.last_tail, self.positions[-1], alpha, GRID_SIZE)
+        return head_pixel, tail_pixel
+    
+    def draw_segment(self, screen, position):
+        self.draw_segment_at(screen, (position[0] * GRID_SIZE, position[1] * GRID_SIZE))
+    
+    def draw_segment_at(self, screen, pixel):
+        screen.blit(self.segment_sprite, pixel)
+    
+    def draw(self, screen, alpha=1.0):
+        head, tail = self.interpolated(alpha)
+        for position in islice(self.positions, 1, None):
+            self.draw_segment(screen, position)
+        if tail is not None:
+            self.draw_segment_at(screen, tail)
+        self.draw_segment_at(screen, head)
 
 class Food:
-    def __init__(self):
+    def __init__(self, free_cells=None, rng=random):
+        self.free_cells = free_cells
+        self.rng = rng
         self.position = self.generate_position()
     
     def generate_position(self):
-        return (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
+        if self.free_cells is not None:
+            return self.free_cells.take(self.rng)
+        return (self.rng.randint(0, GRID_WIDTH - 1), self.rng.randint(0, GRID_HEIGHT - 1))
     
-    def draw(self, screen):
-        rect = pygame.Rect(self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+    def draw(self, screen, offset=(0, 0)):
+        rect = pygame.Rect(self.position[0] * GRID_SIZE - offset[0], self.position[1] * GRID_SIZE - offset[1], GRID_SIZE, GRID_SIZE)
         pygame.draw.rect(screen, RED, rect)
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Snake Game")
+    VARIANT = 'snake_game'
+    
+    def __init__(self, dirty_rendering=False, seed=None, headless=False, replay_path=None, profile=False, arena=None, autopilot=False, telemetry=None, render_fps=RENDER_FPS):
+        self.headless = headless
+        self.screen = None
+        if not headless:
+            init_display()
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            pygame.display.set_caption("Snake Game")
         self.clock = pygame.time.Clock()
-        self.snake = Snake()
-        self.food = Food()
+        self.render_cache = RenderCache()
+        self.board_width, self.board_height = arena or (GRID_WIDTH, GRID_HEIGHT)
+        self.camera = None
+        if arena is not None:
+            self.camera = Camera((WINDOW_WIDTH, WINDOW_HEIGHT), (self.board_width * GRID_SIZE, self.board_height * GRID_SIZE))
+        self.dirty_rects = None
+        if dirty_rendering and self.camera is None:
+            self.dirty_rects = DirtyRectTracker((WINDOW_WIDTH, WINDOW_HEIGHT), GRID_SIZE)
+        self.input_buffer = InputBuffer()
+        self.profiler = FrameProfiler(profile, inputs=self.input_buffer)
+        self.replay_path = replay_path
+        self.autopilot_enabled = autopilot
+        self.telemetry = telemetry
+        self.render_fps = render_fps
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.replay = None
+        if self.replay_path is not None:
+            self.replay = Replay(self.VARIANT, self.seed, self.board_width, self.board_height, TICK_RATE, arena=self.camera is not None)
+        if self.telemetry is not None:
+            self.game_id = self.telemetry.start_game(self.VARIANT)
+        if self.camera is None:
+            self.free_cells = FreeCellIndex(GRID_WIDTH, GRID_HEIGHT)
+            self.snake = Snake(self.free_cells)
+        else:
+            self.free_cells = SparseFreeCells(self.board_width, self.board_height)
+            occupancy = ChunkedOccupancy(self.board_width, self.board_height)
+            self.snake = Snake(self.free_cells, self.board_width, self.board_height, occupancy)
+            self.chunks = ChunkRenderer(self.snake.positions, GRID_SIZE, BLACK)
+        self.food = Food(self.free_cells, self.rng)
         self.score = 0
-        self.font = pygame.font.Font(None, 36)
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.input_buffer.clear()
+        self.autopilot = Autopilot(self) if self.autopilot_enabled else None
+        self.drawn_food = None
+        if self.dirty_rects is not None:
+            self.snake.positions.track_changes()
+            self.dirty_rects.invalidate()
     
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    self.snake.change_direction((0, -1))
-                elif event.key == pygame.K_DOWN:
-                    self.snake.change_direction((0, 1))
-                elif event.key == pygame.K_LEFT:
-                    self.snake.change_direction((-1, 0))
-                elif event.key == pygame.K_RIGHT:
-                    self.snake.change_direction((1, 0))
+            elif event.type == pygame.KEYDOWN and event.key in KEY_DIRECTIONS:
+                self.input_buffer.push(KEY_DIRECTIONS[event.key], pygame.time.get_ticks(), self.snake.direction)
+            elif event.type == pygame.KEYDOWN and event.key == AUTOPILOT_KEY:
+                self.toggle_autopilot()
+            elif self.profiler.handle_event(event) and self.dirty_rects is not None:
+                self.dirty_rects.invalidate()
         return True
     
+    def apply_input(self):
+        direction = self.input_buffer.pop(pygame.time.get_ticks())
+        if self.autopilot is not None:
+            direction = self.autopilot(self)
+        if direction is not None:
+            self.snake.change_direction(direction)
+    
+    def toggle_autopilot(self):
+        self.autopilot_enabled = not self.autopilot_enabled
+        self.autopilot = Autopilot(self) if self.autopilot_enabled else None
+    
+    def save_replay(self):
+        if self.replay is None:
+            return
+        self.replay.finish(self.tick, self.score)
+        write_replays(self.replay_path, [self.replay])
+        self.replay = None
+    
+    def emit(self, event, detail=''):
+        if self.telemetry is not None:
+            self.telemetry.emit(self.game_id, self.tick, event, detail, self.score, len(self.snake.positions))
+    
+    def die(self, cause):
+        self.emit('death', cause)
+        if self.telemetry is not None:
+            self.telemetry.flush()
+        return False
+    
+    def collision_cause(self):
+        head = self.snake.positions[0]
+        x, y = head[0] + self.snake.direction[0], head[1] + self.snake.direction[1]
+        return 'wall' if not (0 <= x < self.board_width and 0 <= y < self.board_height) else 'self'
+    
     def update(self):
-        if not self.snake.move():
-            return False
+        self.apply_input()
+        if self.replay is not None:
+            self.replay.record(self.tick, self.snake.direction)
+        self.tick += 1
+        with self.profiler.section('update.move'):
+            moved = self.snake.move()
+        if not moved:
+            return self.die(self.collision_cause())
         
-        if self.snake.positions[0] == self.food.position:
-            self.snake.grow_snake()
-            self.score += 10
-            while self.food.position in self.snake.positions:
+        with self.profiler.section('update.pickup'):
+            if self.snake.positions[0] == self.food.position:
+                self.snake.grow_snake()
+                self.score += 10
+                self.emit('pickup', 'food')
                 self.food.position = self.food.generate_position()
+                if self.food.position is None:
+                    return self.die('board_full')
         
+        if self.telemetry is not None:
+            self.emit('tick')
         return True
     
-    def draw(self):
-        self.screen.fill(BLACK)
-        self.snake.draw(self.screen)
-        self.food.draw(self.screen)
+    def score_text(self):
+        return self.render_cache.text(f"Score: {self.score}", 36, WHITE)
+    
+    def snake_rects(self, alpha):
+        head, tail = self.snake.interpolated(alpha)
+        rects = [pygame.Rect(head, (GRID_SIZE, GRID_SIZE))]
+        if tail is not None:
+            rects.append(pygame.Rect(tail, (GRID_SIZE, GRID_SIZE)))
+        return rects
+    
+    def draw(self, alpha=1.0):
+        if self.camera is not None:
+            self.draw_arena(alpha)
+            return
+        if self.profiler.overlay and self.dirty_rects is not None:
+            self.dirty_rects.invalidate()
+        if self.dirty_rects is not None and not self.dirty_rects.full:
+            self.draw_dirty(alpha)
+            return
         
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+        with self.profiler.section('draw.clear'):
+            self.screen.fill(BLACK)
+        with self.profiler.section('draw.snake'):
+            self.snake.draw(self.screen, alpha)
+        with self.profiler.section('draw.food'):
+            self.food.draw(self.screen)
+        with self.profiler.section('draw.hud'):
+            score_text = self.score_text()
+            self.screen.blit(score_text, (10, 10))
+        if self.profiler.overlay:
+            self.profiler.draw_overlay(self.screen)
         
-        pygame.display.flip()
+        if self.dirty_rects is None:
+            with self.profiler.section('draw.present'):
+                pygame.display.flip()
+            return
+        
+        self.snake.positions.drain_changes()
+        self.drawn_head = self.snake.positions[0]
+        self.drawn_snake_rects = self.snake_rects(alpha)
+        self.drawn_food = self.food.position
+        self.drawn_score_text = score_text
+        with self.profiler.section('draw.present'):
+            self.dirty_rects.present()
+    
+    def draw_arena(self, alpha):
+        head, tail = self.snake.interpolated(alpha)
+        camera = self.camera
+        camera.follow((head[0] + GRID_SIZE // 2, head[1] + GRID_SIZE // 2))
+        
+        with self.profiler.section('draw.clear'):
+            self.screen.fill(BLACK)
+        with self.profiler.section('draw.snake'):
+            self.chunks.draw(self.screen, camera, self.snake.segment_sprite)
+            if tail is not None:
+                self.snake.draw_segment_at(self.screen, camera.to_screen(tail))
+            self.snake.draw_segment_at(self.screen, camera.to_screen(head))
+        with self.profiler.section('draw.food'):
+            self.food.draw(self.screen, (camera.x, camera.y))
+        with self.profiler.section('draw.hud'):
+            self.screen.blit(self.score_text(), (10, 10))
+        if self.profiler.overlay:
+            self.profiler.draw_overlay(self.screen)
+        
+        with self.profiler.section('draw.present'):
+            pygame.display.flip()
+    
+    def draw_dirty(self, alpha):
+        tracker = self.dirty_rects
+        for position in self.snake.positions.drain_changes():
+            tracker.add_cell(position)
+        
+        if self.snake.positions[0] != self.drawn_head:
+            tracker.add_cell(self.drawn_head)
+            self.drawn_head = self.snake.positions[0]
+        
+        snake_rects = self.snake_rects(alpha)
+        for rect in self.drawn_snake_rects + snake_rects:
+            tracker.add(rect)
+        self.drawn_snake_rects = snake_rects
+        
+        if self.food.position != self.drawn_food:
+            tracker.add_cell(self.drawn_food)
+            tracker.add_cell(self.food.position)
+            self.drawn_food = self.food.position
+        
+        score_text = self.score_text()
+        score_rect = score_text.get_rect(topleft=(10, 10))
+        if score_text is not self.drawn_score_text:
+            tracker.add(self.drawn_score_text.get_rect(topleft=(10, 10)))
+            tracker.add(score_rect)
+            self.drawn_score_text = score_text
+        
+        if tracker.full:
+            self.draw(alpha)
+            return
+        
+        head = self.snake.positions[0]
+        with self.profiler.section('draw.dirty'):
+            for rect in tracker.rects:
+                self.screen.set_clip(rect)
+                self.screen.fill(BLACK)
+                for position in tracker.cells_in(rect):
+                    if position in self.snake.positions and position != head:
+                        self.snake.draw_segment(self.screen, position)
+                for snake_rect in reversed(snake_rects):
+                    if rect.colliderect(snake_rect):
+                        self.snake.draw_segment_at(self.screen, snake_rect.topleft)
+                if rect.colliderect(tracker.cell_rect(self.food.position)):
+                    self.food.draw(self.screen)
+                if rect.colliderect(score_rect):
+                    self.screen.blit(score_text, (10, 10))
+            self.screen.set_clip(None)
+        
+        with self.profiler.section('draw.present'):
+            tracker.present()
     
     def game_over_screen(self):
-        game_over_text = self.font.render("Game Over!", True, WHITE)
-        final_score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
-        restart_text = self.font.render("Press SPACE to restart or ESC to quit", True, WHITE)
+        game_over_text = self.render_cache.text("Game Over!", 36, WHITE)
+        final_score_text = self.render_cache.text(f"Final Score: {self.score}", 36, WHITE)
+        restart_text = self.render_cache.text("Press SPACE to restart or ESC to quit", 36, WHITE)
         
         game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
         final_score_rect = final_score_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
@@ -132,35 +381,62 @@ class Game:
         game_over = False
         
         while running:
+            elapsed = self.clock.tick(self.render_fps) / 1000
             if not game_over:
-                if not self.handle_events():
+                self.profiler.begin_frame()
+                with self.profiler.section('events'):
+                    handled = self.handle_events()
+                if not handled:
+                    self.save_replay()
+                    self.emit('end', 'quit')
                     running = False
                     continue
                 
-                if not self.update():
-                    game_over = True
+                self.timestep.add_time(elapsed)
+                while self.timestep.consume():
+                    with self.profiler.section('update'):
+                        alive = self.update()
+                    if not alive:
+                        self.save_replay()
+                        game_over = True
+                        break
+                if game_over:
                     continue
                 
-                self.draw()
-                self.clock.tick(10)
+                with self.profiler.section('draw'):
+                    self.draw(self.timestep.alpha)
+                self.profiler.end_frame()
             else:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_SPACE:
-                            self.snake = Snake()
-                            self.food = Food()
-                            self.score = 0
+                            self.reset()
                             game_over = False
                         elif event.key == pygame.K_ESCAPE:
                             running = False
                 
                 self.game_over_screen()
         
+        if self.telemetry is not None:
+            self.telemetry.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Snake Game")
+    parser.add_argument('--dirty-rects', action='store_true')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--record', metavar='ARCHIVE')
+    parser.add_argument('--profile', action='store_true', help="time every frame phase (F3 overlay, F12 export)")
+    parser.add_argument('--autopilot', action='store_true', help="let the built-in AI steer (Tab toggles)")
+    parser.add_argument('--fps', type=int, default=RENDER_FPS, help="render frame rate, e.g. 60, 120 or 144; game ticks stay at TICK_RATE")
+    parser.add_argument('--arena', metavar='WxH', help="play on a board of this many cells with a scrolling camera")
+    parser.add_argument('--telemetry', metavar='PATH', help="stream gameplay events to rotated files PATH-NNNN.*")
+    parser.add_argument('--telemetry-format', choices=sorted(FORMATS), default='jsonl')
+    args = parser.parse_args()
+    arena = tuple(int(size) for size in args.arena.split('x')) if args.arena else None
+    telemetry = TelemetryWriter(args.telemetry, args.telemetry_format) if args.telemetry else None
+    game = Game(dirty_rendering=args.dirty_rects, seed=args.seed, replay_path=args.record, profile=args.profile, autopilot=args.autopilot, arena=arena, telemetry=telemetry, render_fps=args.fps)
     game.run()
\ No newline at end of file
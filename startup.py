@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPEAT = 5
+SUBSYSTEMS = ('display', 'font', 'mixer', 'joystick')
+
+STARTUP_BUDGETS_MS = {
+    'import snake_game': 350,
+    'import snake_enhanced': 350,
+    'import tournament': 75,
+    'import server': 400,
+    'headless snake_game': 375,
+    'headless snake_enhanced': 375,
+    'window snake_game': 450,
+    'window snake_enhanced': 450,
+}
+
+CASES = {
+    'import snake_game': "import snake_game",
+    'import snake_enhanced': "import snake_enhanced",
+    'import tournament': "import tournament",
+    'import server': "import server",
+    'headless snake_game': "import snake_game; snake_game.Game(headless=True).update()",
+    'headless snake_enhanced': "import snake_enhanced; snake_enhanced.Game(headless=True).update()",
+    'window snake_game': "import snake_game; snake_game.Game().draw()",
+    'window snake_enhanced': "import snake_enhanced; snake_enhanced.Game().draw()",
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+import pygame
+started = [name for name in sys.argv[2:] if getattr(getattr(pygame, name), 'get_init', bool)()]
+print(json.dumps({'ms': elapsed * 1000, 'started': started}))
+"""
+
+def probe(code, env):
+    process = subprocess.run([sys.executable, '-c', PROBE, code, *SUBSYSTEMS], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def measure(names, repeat=REPEAT, env=None):
+    results = {}
+    for name in names:
+        runs = [probe(CASES[name], env) for _ in range(repeat)]
+        results[name] = {
+            'best_ms': min(run['ms'] for run in runs),
+            'budget_ms': STARTUP_BUDGETS_MS[name],
+            'started': runs[0]['started'],
+        }
+    return results
+
+def report(results, scale=1.0):
+    failures = []
+    for name, result in results.items():
+        budget = result['budget_ms'] * scale
+        over = result['best_ms'] > budget
+        leaked = name.startswith('import') and result['started']
+        status = 'OVER' if over else 'LEAK' if leaked else 'ok'
+        started = ','.join(result['started']) or '-'
+        print(f"{status:>5} {result['best_ms']:8.1f}ms / {budget:6.0f}ms  {name:<26} started: {started}")
+        if status != 'ok':
+            failures.append(name)
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the game modules against a startup budget")
+    parser.add_argument('--case', choices=sorted(CASES), action='append', help="measure only this case (repeatable)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="fresh interpreters per case; the best run counts")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget, for slower machines")
+    parser.add_argument('--dummy-video', action='store_true', help="open windows with the SDL dummy video driver")
+    parser.add_argument('--output', metavar='JSON', help="write the measurements to this file")
+    args = parser.parse_args(argv)
+    
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    if args.dummy_video:
+        env['SDL_VIDEODRIVER'] = 'dummy'
+    results = measure(args.case or list(CASES), args.repeat, env)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    
+    failures = report(results, args.scale)
+    if failures:
+        print(f"{len(failures)} startup case(s) over budget or starting pygame subsystems on import")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
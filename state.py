@@ -0,0 +1,428 @@
+import argparse
+import importlib
+import math
+import random
+import struct
+import sys
+from array import array
+
+from autopilot import Autopilot
+from entities import FOOD, WALL
+from policies import POLICIES
+from replay import DIRECTION_CODES, DIRECTIONS, GAMES
+from snake_body import SnakeBody
+from snake_enhanced import (DOUBLE_POINTS_TICKS, GHOST_TICKS, POWER_UP_LIFETIME, POWER_UP_SPAWN_TICKS,
+                            POWER_UP_TYPES, PowerUp)
+
+MAGIC = b'SNKS'
+VERSION = 1
+FOOD_POINTS = 10
+HEADER = struct.Struct('<4sBBHHIIBBiiiidIIH')
+POWER_UP = struct.Struct('<iBI')
+USED = struct.Struct(f'<{len(POWER_UP_TYPES)}I')
+RNG_HEADER = struct.Struct('<Id')
+LOCKSTEP_TICKS = 3000
+
+GROW, ALIVE, GHOST, DOUBLE_POINTS = 1, 2, 4, 8
+
+_rng = random.Random(0)
+
+class GameState:
+    __slots__ = ('variant', 'width', 'height', 'tick', 'score', 'direction', 'grow', 'alive',
+                 'body', 'head_index', 'length', 'occupancy', 'free_cells', 'slots', 'free_count',
+                 'food', 'power_ups', 'next_power_up_tick', 'ghost', 'ghost_end_tick',
+                 'double_points', 'double_points_end_tick', 'speed', 'power_ups_used', 'rng_state', 'shared')
+    
+    def __init__(self, variant, width, height):
+        cells = width * height
+        self.variant = variant
+        self.width = width
+        self.height = height
+        self.tick = 0
+        self.score = 0
+        self.direction = DIRECTION_CODES[(1, 0)]
+        self.grow = False
+        self.alive = True
+        self.body = array('I', bytes(4 * cells))
+        self.head_index = 0
+        self.length = 0
+        self.occupancy = array('H', bytes(2 * cells))
+        self.free_cells = None
+        self.slots = None
+        self.free_count = 0
+        self.food = -1
+        self.power_ups = ()
+        self.next_power_up_tick = 0
+        self.ghost = False
+        self.ghost_end_tick = 0
+        self.double_points = False
+        self.double_points_end_tick = 0
+        self.speed = 1.0
+        self.power_ups_used = (0,) * len(POWER_UP_TYPES)
+        self.rng_state = None
+        self.shared = False
+    
+    @property
+    def enhanced(self):
+        return self.variant == 'snake_enhanced'
+    
+    @property
+    def head(self):
+        return self.body[self.head_index]
+    
+    def cells(self):
+        capacity = len(self.body)
+        end = self.head_index + self.length
+        if end <= capacity:
+            return self.body[self.head_index:end]
+        return self.body[self.head_index:] + self.body[:end - capacity]
+    
+    def position(self, cell):
+        return None if cell < 0 else (cell % self.width, cell // self.width)
+    
+    @classmethod
+    def capture(cls, game):
+        free_cells = game.free_cells
+        if getattr(game, 'camera', None) is not None:
+            raise ValueError("arena games keep sparse occupancy and cannot be captured")
+        if hasattr(game, 'entities') and game.entities.count(WALL):
+            raise ValueError("games with walls cannot be captured")
+        snake = game.snake
+        body = snake.positions
+        width = body.width
+        state = cls(game.VARIANT, width, body.height)
+        state.tick = game.tick
+        state.score = game.score
+        state.direction = DIRECTION_CODES[snake.direction]
+        state.grow = snake.grow
+        state.length = len(body)
+        state.body[:state.length] = array('I', [y * width + x for x, y in body])
+        state.occupancy = body.occupancy[:]
+        state.free_cells = array('I', free_cells.cells)
+        state.slots = array('I', free_cells.slots)
+        state.free_count = free_cells.free_count
+        state.food = -1 if game.food.position is None else game.food.position[1] * width + game.food.position[0]
+        state.rng_state = game.rng.getstate()
+        if state.enhanced:
+            state.power_ups = tuple((power_up.position[1] * width + power_up.position[0], POWER_UP_TYPES.index(power_up.type),
+                                     power_up.spawn_tick) for power_up in game.power_ups())
+            state.next_power_up_tick = game.next_power_up_tick
+            state.ghost = snake.ghost_mode
+            state.ghost_end_tick = snake.ghost_end_tick
+            state.double_points = snake.double_points
+            state.double_points_end_tick = snake.double_points_end_tick
+            state.speed = snake.speed_multiplier
+            state.power_ups_used = tuple(game.power_ups_used.get(kind, 0) for kind in POWER_UP_TYPES)
+        return state
+    
+    def restore(self, game):
+        if game.VARIANT != self.variant or getattr(game, 'camera', None) is not None:
+            raise ValueError(f"cannot restore a {self.variant} state into {game.VARIANT}")
+        free_cells = game.free_cells
+        free_cells.cells = array('l', self.free_cells)
+        free_cells.slots = array('l', self.slots)
+        free_cells.free_count = self.free_count
+        body = SnakeBody(self.width, self.height, [self.position(cell) for cell in self.cells()])
+        body.free_cells = free_cells
+        
+        snake = game.snake
+        snake.positions = body
+        snake.direction = DIRECTIONS[self.direction]
+        snake.grow = self.grow
+        snake.last_tail = None
+        game.food.position = self.position(self.food)
+        game.tick = self.tick
+        game.score = self.score
+        game.rng.setstate(self.rng_state)
+        game.input_buffer.clear()
+        if self.enhanced:
+            game.entities.clear()
+            game.entities.add(game.food, FOOD)
+            for entry in self.power_ups:
+                power_up = self.power_up(game, *entry)
+                game.entities.add(power_up, power_up.type)
+            game.next_power_up_tick = self.next_power_up_tick
+            game.power_ups_used = {kind: used for kind, used in zip(POWER_UP_TYPES, self.power_ups_used) if used}
+            game.particles.clear()
+            snake.ghost_mode = self.ghost
+            snake.ghost_end_tick = self.ghost_end_tick
+            snake.double_points = self.double_points
+            snake.double_points_end_tick = self.double_points_end_tick
+            snake.speed_multiplier = self.speed
+            snake.trail_positions = []
+            game.reschedule()
+        else:
+            game.drawn_food = None
+        if game.dirty_rects is not None:
+            body.track_changes()
+            game.dirty_rects.invalidate()
+        if game.autopilot is not None:
+            game.autopilot = Autopilot(game)
+    
+    def power_up(self, game, cell, kind, spawn_tick):
+        power_up = PowerUp.__new__(PowerUp)
+        power_up.free_cells = game.free_cells
+        power_up.rng = game.rng
+        power_up.position = self.position(cell)
+        power_up.type = POWER_UP_TYPES[kind]
+        power_up.spawn_tick = spawn_tick
+        power_up.duration = POWER_UP_LIFETIME
+        power_up.expiry = None
+        return power_up
+    
+    def clone(self):
+        copy = GameState.__new__(GameState)
+        copy.variant, copy.width, copy.height = self.variant, self.width, self.height
+        copy.tick, copy.score, copy.direction, copy.grow, copy.alive = self.tick, self.score, self.direction, self.grow, self.alive
+        copy.body, copy.head_index, copy.length = self.body, self.head_index, self.length
+        copy.occupancy, copy.free_cells, copy.slots, copy.free_count = self.occupancy, self.free_cells, self.slots, self.free_count
+        copy.food, copy.power_ups, copy.next_power_up_tick = self.food, self.power_ups, self.next_power_up_tick
+        copy.ghost, copy.ghost_end_tick = self.ghost, self.ghost_end_tick
+        copy.double_points, copy.double_points_end_tick = self.double_points, self.double_points_end_tick
+        copy.speed, copy.power_ups_used, copy.rng_state = self.speed, self.power_ups_used, self.rng_state
+        self.shared = copy.shared = True
+        return copy
+    
+    def own(self):
+        self.body = self.body[:]
+        self.occupancy = self.occupancy[:]
+        self.free_cells = self.free_cells[:]
+        self.slots = self.slots[:]
+        self.shared = False
+    
+    def occupy(self, cell):
+        slot = self.slots[cell]
+        if slot < self.free_count:
+            self.free_count -= 1
+            self.swap(slot, self.free_count)
+    
+    def release(self, cell):
+        slot = self.slots[cell]
+        if slot >= self.free_count:
+            self.swap(slot, self.free_count)
+            self.free_count += 1
+    
+    def swap(self, slot_a, slot_b):
+        cells = self.free_cells
+        cell_a = cells[slot_a]
+        cell_b = cells[slot_b]
+        cells[slot_a] = cell_b
+        cells[slot_b] = cell_a
+        self.slots[cell_a] = slot_b
+        self.slots[cell_b] = slot_a
+    
+    def take(self, rng):
+        if self.free_count == 0:
+            return -1
+        cell = self.free_cells[rng.randrange(self.free_count)]
+        self.occupy(cell)
+        return cell
+    
+    def push_head(self, cell):
+        self.head_index = (self.head_index - 1) % len(self.body)
+        self.body[self.head_index] = cell
+        self.length += 1
+        self.occupancy[cell] += 1
+        if self.occupancy[cell] == 1:
+            self.occupy(cell)
+    
+    def pop_tail(self):
+        self.length -= 1
+        cell = self.body[(self.head_index + self.length) % len(self.body)]
+        self.occupancy[cell] -= 1
+        if self.occupancy[cell] == 0:
+            self.release(cell)
+    
+    def step(self, direction=None):
+        if not self.alive:
+            return False
+        if self.shared:
+            self.own()
+        current = DIRECTIONS[self.direction]
+        if direction is not None and (-direction[0], -direction[1]) != current:
+            current = direction
+            self.direction = DIRECTION_CODES[direction]
+        self.tick += 1
+        
+        width = self.width
+        head = self.body[self.head_index]
+        x = head % width + current[0]
+        y = head // width + current[1]
+        if self.ghost:
+            x %= width
+            y %= self.height
+        elif x < 0 or x >= width or y < 0 or y >= self.height or self.occupancy[y * width + x]:
+            self.alive = False
+            return False
+        cell = y * width + x
+        self.push_head(cell)
+        if self.grow:
+            self.grow = False
+        else:
+            self.pop_tail()
+        
+        if self.ghost and self.tick > self.ghost_end_tick:
+            self.ghost = False
+        
+        rng = None
+        if cell == self.food:
+            self.grow = True
+            self.score += FOOD_POINTS * 2 if self.double_points else FOOD_POINTS
+            rng = self.rng()
+            self.food = self.take(rng)
+            if self.food < 0:
+                self.alive = False
+        if self.enhanced and self.alive:
+            rng = self.update_power_ups(cell, rng)
+        if self.double_points and self.tick >= self.double_points_end_tick:
+            self.double_points = False
+        if rng is not None:
+            self.rng_state = rng.getstate()
+        return self.alive
+    
+    def rng(self):
+        _rng.setstate(self.rng_state)
+        return _rng
+    
+    def update_power_ups(self, cell, rng):
+        remaining = []
+        for entry in self.power_ups:
+            power_cell, kind, spawn_tick = entry
+            if power_cell == cell:
+                self.apply_power_up(POWER_UP_TYPES[kind])
+                used = list(self.power_ups_used)
+                used[kind] += 1
+                self.power_ups_used = tuple(used)
+            elif self.tick - spawn_tick > POWER_UP_LIFETIME:
+                self.release(power_cell)
+            else:
+                remaining.append(entry)
+        if len(remaining) != len(self.power_ups):
+            self.power_ups = tuple(remaining)
+        
+        if self.tick >= self.next_power_up_tick:
+            rng = rng or self.rng()
+            power_cell = self.take(rng)
+            kind = POWER_UP_TYPES.index(rng.choice(POWER_UP_TYPES))
+            if power_cell >= 0:
+                self.power_ups += ((power_cell, kind, self.tick),)
+            self.next_power_up_tick = self.tick + rng.randint(*POWER_UP_SPAWN_TICKS)
+        return rng
+    
+    def apply_power_up(self, power_type):
+        if power_type == 'speed':
+            self.speed = 2.0
+        elif power_type == 'slow':
+            self.speed = 0.5
+        elif power_type == 'ghost':
+            self.ghost = True
+            self.ghost_end_tick = self.tick + GHOST_TICKS
+        elif power_type == 'double_points':
+            self.double_points = True
+            self.double_points_end_tick = self.tick + DOUBLE_POINTS_TICKS
+        elif power_type == 'shrink' and self.length > 3:
+            for _ in range(self.length - self.length // 2):
+                self.pop_tail()
+    
+    def to_bytes(self):
+        flags = (GROW if self.grow else 0) | (ALIVE if self.alive else 0) | (GHOST if self.ghost else 0) | (DOUBLE_POINTS if self.double_points else 0)
+        out = bytearray(HEADER.pack(MAGIC, VERSION, GAMES.index(self.variant), self.width, self.height, self.tick, self.score,
+                                    self.direction, flags, self.food, self.next_power_up_tick, self.ghost_end_tick,
+                                    self.double_points_end_tick, self.speed, self.length, self.free_count, len(self.power_ups)))
+        out += self.cells().tobytes()
+        out += self.free_cells.tobytes()
+        out += self.slots.tobytes()
+        out += self.occupancy.tobytes()
+        for entry in self.power_ups:
+            out += POWER_UP.pack(*entry)
+        out += USED.pack(*self.power_ups_used)
+        version, internal, gauss = self.rng_state
+        out += RNG_HEADER.pack(version, math.nan if gauss is None else gauss)
+        out += array('I', internal).tobytes()
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, variant, width, height, tick, score, direction, flags, food, next_power_up_tick, ghost_end_tick,
+         double_points_end_tick, speed, length, free_count, power_up_count) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a snake game state")
+        cells = width * height
+        state = cls(GAMES[variant], width, height)
+        state.tick = tick
+        state.score = score
+        state.direction = direction
+        state.grow = bool(flags & GROW)
+        state.alive = bool(flags & ALIVE)
+        state.ghost = bool(flags & GHOST)
+        state.double_points = bool(flags & DOUBLE_POINTS)
+        state.food = food
+        state.next_power_up_tick = next_power_up_tick
+        state.ghost_end_tick = ghost_end_tick
+        state.double_points_end_tick = double_points_end_tick
+        state.speed = speed
+        offset = HEADER.size
+        
+        state.length = length
+        state.body[:length] = array('I', data[offset:offset + 4 * length])
+        offset += 4 * length
+        state.free_cells = array('I', data[offset:offset + 4 * cells])
+        offset += 4 * cells
+        state.slots = array('I', data[offset:offset + 4 * cells])
+        offset += 4 * cells
+        state.occupancy = array('H', data[offset:offset + 2 * cells])
+        offset += 2 * cells
+        state.free_count = free_count
+        
+        power_ups = []
+        for _ in range(power_up_count):
+            power_ups.append(POWER_UP.unpack_from(data, offset))
+            offset += POWER_UP.size
+        state.power_ups = tuple(power_ups)
+        state.power_ups_used = USED.unpack_from(data, offset)
+        offset += USED.size
+        
+        rng_version, gauss = RNG_HEADER.unpack_from(data, offset)
+        offset += RNG_HEADER.size
+        internal = tuple(array('I', data[offset:]))
+        state.rng_state = (rng_version, internal, None if math.isnan(gauss) else gauss)
+        return state
+
+def lockstep(game, policy, max_ticks=LOCKSTEP_TICKS):
+    state = GameState.capture(game)
+    alive = True
+    while alive and game.tick < max_ticks:
+        direction = policy(game)
+        if direction is not None:
+            game.snake.change_direction(direction)
+        alive = game.update()
+        if state.step(game.snake.direction) != alive:
+            return game.tick
+        if alive and GameState.capture(game).to_bytes() != state.to_bytes():
+            return game.tick
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that GameState.step stays in lockstep with Game.update")
+    parser.add_argument('--games', type=int, default=20, help="seeded games per variant and policy")
+    parser.add_argument('--ticks', type=int, default=LOCKSTEP_TICKS, help="stop a game after this many ticks")
+    parser.add_argument('--policy', choices=sorted(POLICIES), action='append', help="policy to steer with (repeatable)")
+    args = parser.parse_args(argv)
+    
+    failures = 0
+    for variant in GAMES:
+        game = importlib.import_module(variant).Game(headless=True)
+        for policy_name in args.policy or ['random', 'greedy']:
+            ticks = 0
+            for seed in range(args.games):
+                game.reset(seed)
+                diverged = lockstep(game, POLICIES[policy_name](game), args.ticks)
+                ticks += game.tick
+                if diverged is not None:
+                    failures += 1
+                    print(f"{variant}/{policy_name} seed {seed}: diverged at tick {diverged}")
+            print(f"{variant}/{policy_name}: {args.games} games, {ticks} ticks")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,9 @@
+import pygame
+
+def init_display():
+    if not pygame.display.get_init():
+        pygame.display.init()
+
+def init_font():
+    if not pygame.font.get_init():
+        pygame.font.init()
\ No newline at end of file
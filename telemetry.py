@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+
+EVENTS = ('start', 'tick', 'pickup', 'death', 'end')
+DETAILS = ('', 'snake_game', 'snake_enhanced', 'food', 'speed', 'slow', 'ghost', 'double_points', 'shrink',
+           'wall', 'self', 'board_full', 'quit')
+RECORD = np.dtype([('game', '<u8'), ('tick', '<u4'), ('event', 'u1'), ('detail', 'u1'), ('score', '<u4'), ('length', '<u4')])
+FIELDS = RECORD.names
+FORMATS = {'jsonl': '.jsonl', 'binary': '.bin'}
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_ROTATE_BYTES = 64 << 20
+SCORE_BUCKET_TICKS = 100
+
+EVENT_CODES = {event: code for code, event in enumerate(EVENTS)}
+DETAIL_CODES = {detail: code for code, detail in enumerate(DETAILS)}
+
+class TelemetryWriter:
+    def __init__(self, path, format='jsonl', batch_size=DEFAULT_BATCH_SIZE, rotate_bytes=DEFAULT_ROTATE_BYTES):
+        if format not in FORMATS:
+            raise ValueError(f"unknown telemetry format {format!r}")
+        self.path = path
+        self.format = format
+        self.batch_size = batch_size
+        self.rotate_bytes = rotate_bytes
+        self.run = int.from_bytes(os.urandom(4), 'little') << 32
+        self.games = 0
+        self.pending = []
+        self.batches = queue.SimpleQueue()
+        self.part = 0
+        self.output = None
+        self.written = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, name='telemetry', daemon=True)
+        self.thread.start()
+    
+    def start_game(self, variant):
+        self.games += 1
+        game_id = self.run | self.games
+        self.emit(game_id, 0, 'start', variant, 0, 0)
+        return game_id
+    
+    def emit(self, game_id, tick, event, detail, score, length):
+        self.pending.append((game_id, tick, event, detail, score, length))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        if self.pending:
+            self.batches.put(self.pending)
+            self.pending = []
+    
+    def close(self):
+        self.flush()
+        self.batches.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+    
+    def drain(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            try:
+                self.write(self.encode(batch))
+            except Exception as error:
+                if self.error is None:
+                    self.error = error
+        if self.output is not None:
+            self.output.close()
+    
+    def encode(self, batch):
+        if self.format == 'binary':
+            return np.array([(game_id, tick, EVENT_CODES[event], DETAIL_CODES[detail], score, length)
+                             for game_id, tick, event, detail, score, length in batch], dtype=RECORD).tobytes()
+        return ''.join(json.dumps(dict(zip(FIELDS, record)), separators=(',', ':')) + '\n' for record in batch).encode()
+    
+    def write(self, data):
+        if self.output is None or self.written >= self.rotate_bytes:
+            if self.output is not None:
+                self.output.close()
+                self.part += 1
+            self.output = open(f"{self.path}-{self.part:04d}{FORMATS[self.format]}", 'ab')
+            self.written = self.output.tell()
+        self.output.write(data)
+        self.written += len(data)
+
+def load_jsonl(path):
+    columns = {name: [] for name in FIELDS}
+    with open(path) as source:
+        for line in source:
+            record = json.loads(line)
+            for name in FIELDS:
+                columns[name].append(record[name])
+    records = np.empty(len(columns['game']), dtype=RECORD)
+    for name in ('game', 'tick', 'score', 'length'):
+        records[name] = columns[name]
+    records['event'] = [EVENT_CODES[event] for event in columns['event']]
+    records['detail'] = [DETAIL_CODES[detail] for detail in columns['detail']]
+    return records
+
+def load(paths):
+    parts = []
+    for path in paths:
+        if path.endswith(FORMATS['binary']):
+            parts.append(np.fromfile(path, dtype=RECORD))
+        else:
+            parts.append(load_jsonl(path))
+    return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD)
+
+def counts(values, names):
+    totals = np.bincount(values, minlength=len(names))
+    return {names[code]: int(total) for code, total in enumerate(totals) if total}
+
+def summarize(records, bucket_ticks=SCORE_BUCKET_TICKS):
+    event = records['event']
+    games = np.unique(records['game'][event == EVENT_CODES['start']])
+    finished = records[(event == EVENT_CODES['death']) | (event == EVENT_CODES['end'])]
+    pickups = records[event == EVENT_CODES['pickup']]
+    ticks = records[event == EVENT_CODES['tick']]
+    summary = {
+        'records': len(records),
+        'games': len(games),
+        'finished': len(finished),
+        'outcomes': counts(finished['detail'], DETAILS),
+        'pickups_per_game': {kind: total / max(1, len(games)) for kind, total in counts(pickups['detail'], DETAILS).items()},
+    }
+    if len(finished):
+        summary['final_score'] = distribution(finished['score'])
+        summary['final_length'] = distribution(finished['length'])
+        summary['final_tick'] = distribution(finished['tick'])
+    if len(ticks):
+        buckets = ticks['tick'] // bucket_ticks
+        samples = np.bincount(buckets)
+        scores = np.bincount(buckets, weights=ticks['score'])
+        lengths = np.bincount(buckets, weights=ticks['length'])
+        seen = np.nonzero(samples)[0]
+        summary['over_time'] = [
+            {'tick': int(bucket * bucket_ticks), 'games': int(samples[bucket]),
+             'score': scores[bucket] / samples[bucket], 'length': lengths[bucket] / samples[bucket]}
+            for bucket in seen
+        ]
+    return summary
+
+def distribution(values):
+    return {
+        'mean': float(values.mean()),
+        'p10': float(np.percentile(values, 10)),
+        'median': float(np.median(values)),
+        'p90': float(np.percentile(values, 90)),
+        'max': int(values.max()),
+    }
+
+def print_summary(summary):
+    print(f"{summary['records']} records, {summary['games']} games, {summary['finished']} finished")
+    print("outcomes: " + (' '.join(f"{detail}={total}" for detail, total in summary['outcomes'].items()) or '-'))
+    print("pickups/game: " + (' '.join(f"{kind}={total:.2f}" for kind, total in summary['pickups_per_game'].items()) or '-'))
+    for name in ('final_score', 'final_length', 'final_tick'):
+        if name in summary:
+            values = summary[name]
+            print(f"{name:<13} mean={values['mean']:.1f} p10={values['p10']:.0f} median={values['median']:.0f} "
+                  f"p90={values['p90']:.0f} max={values['max']}")
+    for row in summary.get('over_time', [])[:20]:
+        print(f"tick {row['tick']:>7}  games={row['games']:<6} score={row['score']:8.1f} length={row['length']:7.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate gameplay telemetry written by --telemetry")
+    parser.add_argument('paths', nargs='+', help="telemetry files or path prefixes")
+    parser.add_argument('--bucket-ticks', type=int, default=SCORE_BUCKET_TICKS, help="tick bucket for score over time")
+    parser.add_argument('--summary', metavar='JSON', help="write the summary to this file")
+    args = parser.parse_args(argv)
+    
+    paths = []
+    for path in args.paths:
+        paths.extend([path] if os.path.isfile(path) else sorted(glob.glob(f"{path}-[0-9][0-9][0-9][0-9].*")))
+    summary = summarize(load(paths), args.bucket_ticks)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as output:
+            json.dump(summary, output, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
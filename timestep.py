@@ -0,0 +1,38 @@
+MAX_FRAME_TIME = 0.25
+
+def interpolate_cell(previous, current, alpha, cell_size):
+    dx = current[0] - previous[0]
+    dy = current[1] - previous[1]
+    if abs(dx) + abs(dy) > 1:
+        alpha = 1.0
+    return (round((previous[0] + dx * alpha) * cell_size), round((previous[1] + dy * alpha) * cell_size))
+
+class FixedTimestep:
+    def __init__(self, tick_rate, max_frame_time=MAX_FRAME_TIME):
+        self.tick_rate = tick_rate
+        self.tick_duration = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.ticks = 0
+    
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.tick_duration)
+    
+    def set_tick_rate(self, tick_rate):
+        if tick_rate == self.tick_rate:
+            return
+        alpha = self.alpha
+        self.tick_rate = tick_rate
+        self.tick_duration = 1.0 / tick_rate
+        self.accumulator = alpha * self.tick_duration
+    
+    def add_time(self, elapsed):
+        self.accumulator += min(elapsed, self.max_frame_time)
+    
+    def consume(self):
+        if self.accumulator < self.tick_duration:
+            return False
+        self.accumulator -= self.tick_duration
+        self.ticks += 1
+        return True
\ No newline at end of file
@@ -0,0 +1,182 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+
+from policies import POLICIES
+
+GAMES = ('snake_game', 'snake_enhanced')
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_ENGINE_BATCH_SIZE = 256
+TICKS_PER_CELL = 250
+ENGINE_GAMES = {'snake_game': ('random', 'greedy')}
+
+_games = {}
+
+def headless_game(name):
+    game = _games.get(name)
+    if game is None:
+        game = _games[name] = importlib.import_module(name).Game(headless=True)
+    return game
+
+def max_ticks_for(game):
+    body = game.snake.positions
+    return body.width * body.height * TICKS_PER_CELL
+
+def play(name, policy_name, seed, max_ticks=None):
+    game = headless_game(name)
+    game.reset(seed)
+    if max_ticks is None:
+        max_ticks = max_ticks_for(game)
+    policy = POLICIES[policy_name](game)
+    alive = True
+    while alive and game.tick < max_ticks:
+        direction = policy(game)
+        if direction is not None:
+            game.snake.change_direction(direction)
+        alive = game.update()
+    return {
+        'game': name,
+        'policy': policy_name,
+        'seed': seed,
+        'score': game.score,
+        'ticks': game.tick,
+        'length': len(game.snake.positions),
+        'finished': not alive,
+        'power_ups': dict(getattr(game, 'power_ups_used', {})),
+    }
+
+def play_engine(name, policy_name, seeds, max_ticks=None):
+    from snake_engine import ENGINE_POLICIES, SnakeEngine
+    engine = SnakeEngine(len(seeds), seed=seeds)
+    choose = ENGINE_POLICIES[policy_name]
+    if max_ticks is None:
+        max_ticks = engine.num_cells * TICKS_PER_CELL
+    for _ in range(max_ticks):
+        if not engine.alive.any():
+            break
+        engine.step(choose(engine))
+    return [{
+        'game': name,
+        'policy': policy_name,
+        'seed': seed,
+        'score': int(engine.score[index]),
+        'ticks': int(engine.ticks[index]) + int(not engine.alive[index] and not engine.won[index]),
+        'length': int(engine.length[index]),
+        'finished': not engine.alive[index],
+        'power_ups': {},
+    } for index, seed in enumerate(seeds)]
+
+def play_batch(task):
+    name, policy_name, seeds, max_ticks, engine = task
+    if engine:
+        return play_engine(name, policy_name, seeds, max_ticks)
+    return [play(name, policy_name, seed, max_ticks) for seed in seeds]
+
+def batches(games, policies, count, seed, batch_size, max_ticks, engine_batch_size=DEFAULT_ENGINE_BATCH_SIZE):
+    for name in games:
+        for policy_name in policies:
+            engine = bool(engine_batch_size) and policy_name in ENGINE_GAMES.get(name, ())
+            size = engine_batch_size if engine else batch_size
+            for start in range(0, count, size):
+                seeds = list(range(seed + start, seed + min(count, start + size)))
+                yield (name, policy_name, seeds, max_ticks, engine)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+def distribution(values):
+    return {
+        'mean': statistics.fmean(values),
+        'stdev': statistics.pstdev(values),
+        'min': min(values),
+        'p10': percentile(values, 0.10),
+        'median': statistics.median(values),
+        'p90': percentile(values, 0.90),
+        'max': max(values),
+    }
+
+def aggregate(results):
+    groups = {}
+    for result in results:
+        groups.setdefault((result['game'], result['policy']), []).append(result)
+    
+    summary = {}
+    for (name, policy_name), group in sorted(groups.items()):
+        power_ups = {}
+        for result in group:
+            for kind, used in result['power_ups'].items():
+                power_ups[kind] = power_ups.get(kind, 0) + used
+        summary[f"{name}/{policy_name}"] = {
+            'games': len(group),
+            'score': distribution([result['score'] for result in group]),
+            'ticks': distribution([result['ticks'] for result in group]),
+            'length': distribution([result['length'] for result in group]),
+            'unfinished': sum(not result['finished'] for result in group),
+            'power_ups_per_game': {kind: used / len(group) for kind, used in sorted(power_ups.items())},
+        }
+    return summary
+
+def run(games, policies, count, seed=0, workers=None, batch_size=DEFAULT_BATCH_SIZE, max_ticks=None, stream=None,
+        engine_batch_size=DEFAULT_ENGINE_BATCH_SIZE):
+    tasks = list(batches(games, policies, count, seed, batch_size, max_ticks, engine_batch_size))
+    results = []
+    with multiprocessing.Pool(workers) as pool:
+        for batch in pool.imap_unordered(play_batch, tasks):
+            results.extend(batch)
+            if stream is not None:
+                for result in batch:
+                    stream.write(json.dumps(result) + '\n')
+                stream.flush()
+    return results
+
+def print_summary(summary, elapsed, total_ticks):
+    print(f"{'game/policy':<28}{'games':>7}{'score':>9}{'p10':>7}{'p90':>7}{'ticks':>9}{'length':>8}  power-ups/game")
+    for key, group in summary.items():
+        power_ups = ' '.join(f"{kind}={used:.2f}" for kind, used in group['power_ups_per_game'].items())
+        print(f"{key:<28}{group['games']:>7}{group['score']['mean']:>9.1f}{group['score']['p10']:>7}"
+              f"{group['score']['p90']:>7}{group['ticks']['mean']:>9.0f}{group['length']['mean']:>8.1f}  {power_ups or '-'}")
+    print(f"{total_ticks} ticks in {elapsed:.2f}s ({total_ticks / elapsed:.0f} ticks/s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded headless games for each policy across a process pool")
+    parser.add_argument('--games', type=int, default=100, help="games per game variant and policy")
+    parser.add_argument('--policy', choices=sorted(POLICIES), action='append', help="policy to evaluate (repeatable)")
+    parser.add_argument('--variant', choices=GAMES, action='append', help="game variant to play (repeatable)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="games per worker task")
+    parser.add_argument('--max-ticks', type=int, default=None, help=f"stop a game after this many ticks (default: {TICKS_PER_CELL} per board cell)")
+    parser.add_argument('--engine-batch-size', type=int, default=DEFAULT_ENGINE_BATCH_SIZE,
+                        help="classic random/greedy games per batched SnakeEngine task (0 plays them through Game objects)")
+    parser.add_argument('--results', metavar='JSONL', help="stream per-game results to this file")
+    parser.add_argument('--summary', metavar='JSON', help="write the aggregated summary to this file")
+    args = parser.parse_args(argv)
+    
+    stream = open(args.results, 'w') if args.results else None
+    start = time.perf_counter()
+    try:
+        results = run(args.variant or GAMES, args.policy or sorted(POLICIES), args.games, args.seed,
+                      args.workers, args.batch_size, args.max_ticks, stream, args.engine_batch_size)
+    finally:
+        if stream is not None:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    
+    summary = aggregate(results)
+    print_summary(summary, elapsed, sum(result['ticks'] for result in results))
+    if args.summary:
+        with open(args.summary, 'w') as output:
+            json.dump(summary, output, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file